@@ -0,0 +1,104 @@
+import asyncio
+from collections import deque
+
+try:
+    from .sequence import SequenceExhausted, Sequences
+except ImportError:
+    from sequence import SequenceExhausted, Sequences
+
+
+class AsyncSequence:
+    """
+    A sequence for asyncio applications. The values are kept in a local buffer that is refilled in bulk, in the
+    background, when it goes below low_water values, so most allocations just take a value from the buffer without
+    blocking the event loop. The values are generated in an executor, and the positions can be reserved in an async
+    store, any object with a coroutine "reserve(count)" returning a range of positions, to share the sequence between
+    processes.
+
+    s = AsyncSequence(factory("[A-Z]{2}-[0-9]{6}"))
+    await s.alloc()
+    AA-000000
+    async for value in s:
+        print(value)
+    """
+
+    def __init__(self, sequence, buffer_size=1000, low_water=None, store=None, executor=None):
+        self.sequence = sequence
+        self.buffer_size = buffer_size
+        self.low_water = buffer_size // 4 if low_water is None else low_water
+        self.store = store
+        self.executor = executor
+        self._buffer = deque()
+        self._task = None
+        self._error = None
+
+    async def _fill(self):
+        """
+        Generate the next buffer_size values and add them to the buffer. With the RAISE exhaustion policy only the
+        values left are generated. SequenceExhausted is raised when no value is generated, unless the policy is WRAP.
+        """
+        loop = asyncio.get_running_loop()
+        if self.store is None:
+            count = self.buffer_size
+            if self.sequence.exhaustion == Sequences.RAISE:
+                count = min(count, self.sequence.count_left())
+                if count <= 0:
+                    raise SequenceExhausted("The sequence has no values left")
+            values = await loop.run_in_executor(self.executor, self.sequence.take, count)
+        else:
+            positions = await self.store.reserve(self.buffer_size)
+            values = await loop.run_in_executor(
+                self.executor, list, self.sequence.iter_allowed(positions.start, positions.stop)
+            )
+        if len(values) <= 0 and self.sequence.exhaustion != Sequences.WRAP:
+            raise SequenceExhausted("The sequence has no values left")
+        self._buffer.extend(values)
+
+    def _retrieve(self):
+        """
+        Keep the exception of a refill that failed in the background, it is raised once the buffer is empty.
+        """
+        task = self._task
+        if task is not None and task.done():
+            self._task = None
+            if not task.cancelled() and task.exception() is not None:
+                self._error = task.exception()
+
+    def _refill(self):
+        """
+        Start a refill of the buffer, unless there is one running already.
+        :return: the task of the refill.
+        """
+        self._retrieve()
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._fill())
+        return self._task
+
+    async def alloc(self):
+        """
+        :return: the next value.
+        """
+        self._retrieve()
+        while len(self._buffer) <= 0:
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            task = self._refill()
+            try:
+                await task
+            finally:
+                if self._task is task:
+                    self._task = None
+        value = self._buffer.popleft()
+        if len(self._buffer) < self.low_water:
+            self._refill()
+        return value
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.alloc()
+        except SequenceExhausted:
+            raise StopAsyncIteration
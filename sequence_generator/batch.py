@@ -0,0 +1,165 @@
+import itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from .sequence import Sequence, Sequences
+except ImportError:
+    from sequence import Sequence, Sequences
+
+MAX_VECTORIZED_SIZE = 2 ** 62
+
+
+def _fill(sequence, ranks, codes, offset):
+    """
+    Write the characters of the values at the given positions in a matrix of character codes.
+    :param sequence: the sequence that generates the values.
+    :param ranks: an array with the positions of the values inside the sequence.
+    :param codes: the matrix of character codes, one row per value.
+    :param offset: the column of the matrix where the first character of the sequence is written.
+    :return: the column right after the last character written.
+    """
+    if not isinstance(sequence, Sequences):
+        table = numpy.array([ord(char) for char in sequence.sequence], dtype=codes.dtype)
+        codes[:, offset] = table.take(ranks)
+        return offset + 1
+
+    digits = {}
+    for idx, size in zip(sequence._get_plan(), sequence._get_sizes()):
+        ranks, digits[idx] = numpy.divmod(ranks, size)
+
+    for idx, value in enumerate(sequence.sequence):
+        if idx in digits:
+            offset = _fill(value, digits[idx], codes, offset)
+            continue
+        if isinstance(value, Sequence):
+            value = str(value.get())
+        codes[:, offset:offset + len(value)] = [ord(char) for char in value]
+        offset += len(value)
+    return offset
+
+
+def _generate(sequence, start, count, kind):
+    """
+    Generate a batch of values with the pure Python iteration of the sequence.
+    :return: a list of strings or bytes.
+    """
+    values = sequence.iter_allowed(start, start + count)
+    if kind == 'S':
+        return [value.encode('latin-1') for value in values]
+    return list(values)
+
+
+def generate(sequence, start, count, kind='U'):
+    """
+    Generate a batch of values of a sequence at once, decomposing the positions of all values in the digits of each
+    child sequence with vectorized operations. The current value of the sequence is not changed. The positions excluded
+    by the exclusion of the sequence are left out, so less than count values may be returned.
+
+    s = factory("[A-Z]{2}-[0-9]{6}")
+    values = generate(s, 0, 10000000)
+
+    :param sequence: the instance of the class Sequences.
+    :param start: the position of the first value.
+    :param count: the number of values to generate.
+    :param kind: "U" to generate unicode strings or "S" to generate bytes, the latter only for latin-1 characters.
+    :return: a numpy array of fixed width strings or, when numpy is not installed, a list of strings.
+    """
+    if numpy is None:
+        return _generate(sequence, start, count, kind)
+
+    width = sequence._width()
+    dtype = '{kind}{width}'.format(kind=kind, width=max(width, 1))
+    size = sequence._length()
+    if size > MAX_VECTORIZED_SIZE or width <= 0:
+        return numpy.array(_generate(sequence, start, count, kind), dtype=dtype)
+
+    integer = numpy.int32 if size + count < 2 ** 31 else numpy.int64
+    if sequence.exclusion is None:
+        ranks = numpy.arange(count, dtype=integer)
+        ranks += start % size
+    else:
+        offset = start - start % size
+        ranks = numpy.concatenate([numpy.empty(0, dtype=integer)] + [
+            numpy.arange(positions.start - offset, positions.stop - offset, dtype=integer)
+            for positions in sequence._get_allowed_ranges(start, start + count)
+        ])
+        count = len(ranks)
+    ranks %= size
+    codes = numpy.empty((count, width), dtype=numpy.uint32 if kind == 'U' else numpy.uint8)
+    _fill(sequence, ranks, codes, 0)
+    return codes.reshape(-1).view(dtype)
+
+
+def _get_table(indexes):
+    """
+    :return: an array with the position of each character code in an alphabet, -1 for the codes not in the alphabet,
+    the last item being always -1.
+    """
+    table = numpy.full(max(ord(char) for char in indexes) + 2, -1, dtype=numpy.int64)
+    for char, index in indexes.items():
+        table[ord(char)] = index
+    return table
+
+
+def validate(sequence, values):
+    """
+    Validate many values at once, checking the length, the constants and the alphabets of each column of all values
+    with vectorized operations.
+
+    s = factory("[A-Z]{2}-[0-9]{6}")
+    ranks = validate(s, ["AB-123456", "AB-12345X"])
+    [1123456, -1]
+
+    :param sequence: the instance of the class Sequences.
+    :param values: a list of strings, or of bytes for latin-1 values.
+    :return: a numpy array with the rank of each value, -1 for the values that can not be generated by the sequence,
+    or a list when numpy is not installed.
+    """
+    if numpy is None or sequence._length() > MAX_VECTORIZED_SIZE:
+        ranks = sequence.validate(value.decode('latin-1') if type(value) == bytes else value for value in values)
+        return [-1 if rank is None else rank for rank in ranks]
+
+    width = sequence._width()
+    array = numpy.asarray(values)
+    count = len(array)
+    ranks = numpy.zeros(count, dtype=numpy.int64)
+    if count <= 0 or array.dtype.kind not in 'US':
+        return ranks - 1
+    unit = 4 if array.dtype.kind == 'U' else 1
+    if array.dtype.itemsize < width * unit:
+        return ranks - 1
+    valid = numpy.char.str_len(array) == width
+    array = array.astype('{kind}{width}'.format(kind=array.dtype.kind, width=width))
+    codes = array.view(numpy.uint32 if unit == 4 else numpy.uint8).reshape(count, width)
+
+    for offset, constant, indexes, weight in sequence._get_checks():
+        if indexes is None:
+            for index, char in enumerate(constant):
+                valid &= codes[:, offset + index] == ord(char)
+            continue
+        table = _get_table(indexes)
+        digits = table.take(numpy.minimum(codes[:, offset], len(table) - 1))
+        valid &= digits >= 0
+        ranks += digits * weight
+    ranks[~valid] = -1
+    return ranks
+
+
+def validate_file(sequence, file, chunk_size=1000000):
+    """
+    Validate the values of a file, one per line, reading chunk_size lines at a time.
+    :param sequence: the instance of the class Sequences.
+    :param file: a file opened in text mode, or in binary mode for latin-1 values.
+    :param chunk_size: the number of lines validated at once.
+    :return: a generator with the ranks of the values of each chunk, as returned by validate.
+    """
+    while True:
+        lines = list(itertools.islice(file, chunk_size))
+        if len(lines) <= 0:
+            return
+        newline = b"\r\n" if type(lines[0]) == bytes else "\r\n"
+        yield validate(sequence, [line.rstrip(newline) for line in lines])
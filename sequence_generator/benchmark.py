@@ -0,0 +1,168 @@
+"""
+Benchmarks of the hot paths of the sequences. Each benchmark reports the best time, in seconds, of a single operation,
+and the memory benchmarks report the bytes of an instance after its first value.
+
+python benchmark.py --output results.json
+python benchmark.py --baseline results.json --tolerance 0.25
+
+When a baseline is given, the benchmarks slower than the baseline by more than the tolerance are reported and the
+script exits with status 1.
+"""
+import argparse
+import functools
+import json
+import sys
+import timeit
+import tracemalloc
+
+try:
+    from .sequence import Sequences, factory, spec_cache_clear
+except ImportError:
+    from sequence import Sequences, factory, spec_cache_clear
+
+PATTERN = "[A-Z]{2}[0-9]{4}"
+LONG_PATTERN = "-".join(["[A-Z]{4}"] * 16)
+
+
+def _factory(pattern):
+    def run():
+        spec_cache_clear()
+        factory(pattern)
+    return run
+
+
+def _cached():
+    return lambda: factory(PATTERN)
+
+
+def _step(method, *args, **kwargs):
+    seq = factory(PATTERN, **kwargs)
+    return lambda: getattr(seq, method)(*args)
+
+
+def _set(distance):
+    seq = factory(PATTERN)
+    value = seq.nth(distance)
+    return lambda: seq.set(value)
+
+
+def _get(pattern):
+    seq = factory(pattern)
+    seq.seek(12345)
+    last = seq.sequence[-1]
+
+    def run():
+        # a different value on every call, rendered in full from the packed indexes
+        last.index ^= 1
+        return seq.get()
+    return run
+
+
+# each benchmark is a function building the timed operation, called only when the benchmark runs, and the number of
+# operations timed at once
+BENCHMARKS = {
+    "factory[width=4]": (functools.partial(_factory, "[A-Z0-9]{4}"), 1000),
+    "factory[width=16]": (functools.partial(_factory, "[A-Z0-9]{16}"), 1000),
+    "factory[width=64]": (functools.partial(_factory, "[A-Z0-9]{64}"), 200),
+    "factory[cached]": (_cached, 10000),
+    "next[right_to_left]": (functools.partial(_step, "next"), 100000),
+    "next[left_to_right]": (functools.partial(_step, "next", direction=Sequences.LEFT_TO_RIGHT), 100000),
+    "next[order]": (functools.partial(_step, "next", order=[2, 3, 4, 5, 0, 1]), 100000),
+    "previous[right_to_left]": (functools.partial(_step, "previous"), 100000),
+    "previous[left_to_right]": (functools.partial(_step, "previous", direction=Sequences.LEFT_TO_RIGHT), 100000),
+    "previous[order]": (functools.partial(_step, "previous", order=[2, 3, 4, 5, 0, 1]), 100000),
+    "advance[1000]": (functools.partial(_step, "advance", 1000), 100000),
+    "set[distance=10]": (functools.partial(_set, 10), 1000),
+    "set[distance=1000]": (functools.partial(_set, 1000), 100),
+    "set[distance=10000]": (functools.partial(_set, 10000), 10),
+    "size": (functools.partial(_step, "size"), 100000),
+    "distance_to_last": (functools.partial(_step, "distance_to_last"), 100000),
+    "get[long]": (functools.partial(_get, LONG_PATTERN), 100000),
+}
+
+
+MEMORY = {
+    "memory[factory]": "INV-[A-C]{3}-[0-2]{4}",
+}
+
+
+def _memory(pattern, count=1000):
+    """
+    :return: the bytes allocated by an instance of a pattern after its first value, in average of count instances.
+    """
+    factory(pattern).next().get()
+    instances = [None] * count
+    tracemalloc.start()
+    try:
+        for x in range(count):
+            seq = instances[x] = factory(pattern)
+            seq.next().get()
+        return tracemalloc.get_traced_memory()[0] / count
+    finally:
+        tracemalloc.stop()
+
+
+def run(names=None, repeat=5):
+    """
+    Run the benchmarks.
+    :param names: the names of the benchmarks to run, all when None.
+    :param repeat: how many times each benchmark is repeated, the best time is reported.
+    :return: a dict with the name of each benchmark and the time of a single operation.
+    """
+    result = {}
+    for name, (setup, number) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        result[name] = min(timeit.Timer(setup()).repeat(repeat=repeat, number=number)) / number
+    for name, pattern in MEMORY.items():
+        if names and name not in names:
+            continue
+        result[name] = _memory(pattern)
+    return result
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compare the results with a baseline.
+    :param results: the results of the benchmarks.
+    :param baseline: the results used as reference.
+    :param tolerance: how much slower than the baseline a benchmark may be, 0.25 means 25% slower.
+    :return: a dict with the name and the ratio between the result and the baseline of the slower benchmarks.
+    """
+    result = {}
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference and value > reference * (1 + tolerance):
+            result[name] = value / reference
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the sequence generator.")
+    parser.add_argument("names", nargs="*", help="the benchmarks to run, all by default")
+    parser.add_argument("--output", help="the file where the results are saved as JSON")
+    parser.add_argument("--baseline", help="a JSON file with results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="the accepted slowdown, 0.25 by default")
+    parser.add_argument("--repeat", type=int, default=5, help="the repetitions of each benchmark, 5 by default")
+    args = parser.parse_args(argv)
+
+    results = run(args.names, args.repeat)
+    for name, value in results.items():
+        unit = "B" if name in MEMORY else "s"
+        print("{name:<28} {value:.3e} {unit}".format(name=name, value=value, unit=unit))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for name, ratio in regressions.items():
+            print("REGRESSION {name}: {ratio:.2f}x slower than the baseline".format(name=name, ratio=ratio))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import bisect
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from .batch import validate_file
+except ImportError:
+    from batch import validate_file
+
+
+class Exclusion:
+    """
+    A set of positions of a sequence that must not be issued, kept as sorted and disjoint intervals with the running
+    total of their lengths, so finding the next position allowed, or counting the positions excluded before one, costs
+    a binary search however many positions are excluded.
+
+    s = factory("[A-Z]{2}-[0-9]{6}")
+    s.exclusion = Exclusion([(0, 10), (20, 30)])
+    s.next().get()
+    AA-000010
+    """
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.stops = []
+        self.totals = []
+        for start, stop in sorted(intervals):
+            self._append(start, stop)
+
+    def _append(self, start, stop):
+        """
+        Add an interval starting at or after the start of the last interval.
+        """
+        if start >= stop:
+            return
+        if len(self.stops) > 0 and start <= self.stops[-1]:
+            if stop > self.stops[-1]:
+                self.totals[-1] += stop - self.stops[-1]
+                self.stops[-1] = stop
+            return
+        self.starts.append(start)
+        self.stops.append(stop)
+        self.totals.append(stop - start + (self.totals[-1] if len(self.totals) > 0 else 0))
+
+    @classmethod
+    def from_ranks(cls, ranks):
+        """
+        Build the intervals from the positions to exclude, in any order and with duplicates.
+        :param ranks: the positions, a list or a numpy array.
+        :return: the instance of the class Exclusion.
+        """
+        result = cls()
+        if numpy is not None and isinstance(ranks, numpy.ndarray) and ranks.dtype.kind == 'i':
+            ranks = numpy.unique(ranks)
+            if len(ranks) > 0:
+                breaks = numpy.flatnonzero(numpy.diff(ranks) != 1)
+                starts = ranks[numpy.r_[0, breaks + 1]]
+                stops = ranks[numpy.r_[breaks, len(ranks) - 1]] + 1
+                result.starts = starts.tolist()
+                result.stops = stops.tolist()
+                result.totals = numpy.cumsum(stops - starts).tolist()
+            return result
+        for rank in sorted(set(ranks)):
+            result._append(rank, rank + 1)
+        return result
+
+    @classmethod
+    def load(cls, sequence, file, chunk_size=1000000):
+        """
+        Load the values to exclude from a file, one per line, ignoring the values the sequence can not generate.
+        :param sequence: the instance of the class Sequences.
+        :param file: a file opened in text mode, or in binary mode for latin-1 values.
+        :param chunk_size: the number of lines validated at once.
+        :return: the instance of the class Exclusion.
+        """
+        result = cls()
+        for ranks in validate_file(sequence, file, chunk_size):
+            if numpy is not None and isinstance(ranks, numpy.ndarray):
+                ranks = ranks[ranks >= 0]
+            else:
+                ranks = [rank for rank in ranks if rank >= 0]
+            result.update(cls.from_ranks(ranks))
+        return result
+
+    def update(self, other):
+        """
+        Exclude the positions of another instance too.
+        :param other: the instance of the class Exclusion.
+        :return: self
+        """
+        intervals = sorted(zip(self.starts + other.starts, self.stops + other.stops))
+        self.starts = []
+        self.stops = []
+        self.totals = []
+        for start, stop in intervals:
+            self._append(start, stop)
+        return self
+
+    def add(self, start, stop=None):
+        """
+        Exclude a position, or the positions from start to stop - 1.
+        :return: self
+        """
+        return self.update(Exclusion([(start, start + 1 if stop is None else stop)]))
+
+    def __contains__(self, position):
+        index = bisect.bisect_right(self.starts, position) - 1
+        return index >= 0 and position < self.stops[index]
+
+    def __len__(self):
+        """
+        :return: the number of positions excluded.
+        """
+        return self.totals[-1] if len(self.totals) > 0 else 0
+
+    def count_before(self, position):
+        """
+        :return: the number of positions excluded before the given one.
+        """
+        index = bisect.bisect_right(self.starts, position) - 1
+        if index < 0:
+            return 0
+        return self.totals[index] - max(0, self.stops[index] - position)
+
+    def count(self, start, stop):
+        """
+        :return: the number of positions excluded from start to stop - 1.
+        """
+        if stop <= start:
+            return 0
+        return self.count_before(stop) - self.count_before(start)
+
+    def nth_allowed(self, rank):
+        """
+        :return: the position not excluded that has rank positions not excluded before it.
+        """
+        # stops[index] - totals[index] is the number of positions allowed before the end of the interval at index
+        first = 0
+        last = len(self.starts)
+        while first < last:
+            middle = (first + last) // 2
+            if self.stops[middle] - self.totals[middle] <= rank:
+                first = middle + 1
+            else:
+                last = middle
+        return rank + (self.totals[first - 1] if first > 0 else 0)
+
+    def next_allowed(self, position):
+        """
+        :return: the first position not excluded at or after the given one.
+        """
+        index = bisect.bisect_right(self.starts, position) - 1
+        if index >= 0 and position < self.stops[index]:
+            return self.stops[index]
+        return position
+
+    def previous_allowed(self, position):
+        """
+        :return: the last position not excluded at or before the given one, may be negative.
+        """
+        index = bisect.bisect_right(self.starts, position) - 1
+        if index >= 0 and position < self.stops[index]:
+            return self.starts[index] - 1
+        return position
+
+    def previous_excluded(self, position):
+        """
+        :return: the last position excluded at or before the given one, or None when there is none.
+        """
+        index = bisect.bisect_right(self.starts, position) - 1
+        if index < 0:
+            return None
+        return min(position, self.stops[index] - 1)
+
+    def next_excluded(self, position):
+        """
+        :return: the first position excluded at or after the given one, or None when there is none.
+        """
+        index = bisect.bisect_right(self.starts, position) - 1
+        if index >= 0 and position < self.stops[index]:
+            return position
+        if index + 1 < len(self.starts):
+            return self.starts[index + 1]
+        return None
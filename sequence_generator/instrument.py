@@ -0,0 +1,205 @@
+import time
+
+try:
+    from .sequence import Sequences
+except ImportError:
+    from sequence import Sequences
+
+
+class Stats:
+    """
+    The counters and timing histograms of an instrumented sequence. The histograms count the calls by duration, the key
+    is the upper bound of the duration in microseconds, a power of 2.
+    """
+
+    def __init__(self, observer=None):
+        self.observer = observer
+        self.next = 0
+        self.previous = 0
+        self.carries = {}
+        self.overflows = 0
+        self.underflows = 0
+        self.exhaustions = 0
+        self.sets = 0
+        self.timings = {"next": {}, "previous": {}, "get": {}, "set": {}}
+
+    def _time(self, name, start):
+        """
+        Add the duration of a call to the histogram of the method.
+        """
+        bucket = 1 << int((time.perf_counter() - start) * 1000000).bit_length()
+        histogram = self.timings[name]
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def _notify(self, event, **data):
+        if self.observer is not None:
+            self.observer(event, data)
+
+    def _carry(self, sequence, depth, flow, count=1):
+        self.carries[depth] = self.carries.get(depth, 0) + count
+        self._notify("carry", sequence=sequence, depth=depth, flow=flow, count=count)
+
+    def _wrap(self, sequence, flow, count=1):
+        if flow == sequence.OVERFLOW:
+            self.overflows += count
+            self._notify("overflow", sequence=sequence, count=count)
+        else:
+            self.underflows += count
+            self._notify("underflow", sequence=sequence, count=count)
+
+    def snapshot(self):
+        """
+        :return: a dict with a copy of all counters and histograms.
+        """
+        return {
+            "next": self.next,
+            "previous": self.previous,
+            "carries": dict(self.carries),
+            "overflows": self.overflows,
+            "underflows": self.underflows,
+            "exhaustions": self.exhaustions,
+            "sets": self.sets,
+            "timings": {name: dict(histogram) for name, histogram in self.timings.items()},
+        }
+
+
+class InstrumentedMixin:
+    """
+    Count and time the calls of a Sequences. An instance of Sequences, or of a subclass, becomes an instance of a class
+    made of this mixin and its original class only while it is instrumented, so a sequence not instrumented runs the
+    methods of its class without any overhead.
+    """
+
+    __slots__ = ()
+
+    def _send(self, *args, **kwargs):
+        idx = args[0]
+        if self._get_carry(idx) is not None:
+            self._stats._carry(self, self._get_plan().index(idx), kwargs.get('flow'))
+        elif self.parent is None:
+            self._stats._wrap(self, kwargs.get('flow'))
+        return super()._send(*args, **kwargs)
+
+    def _carry_wraps(self, sequence, wraps):
+        if self._get_carry(sequence) is not None:
+            flow = self.OVERFLOW if wraps > 0 else self.UNDERFLOW
+            self._stats._carry(self, self._get_plan().index(sequence), flow, abs(wraps))
+        return super()._carry_wraps(sequence, wraps)
+
+    def _send_wraps(self, wraps):
+        if self.parent is None:
+            self._stats._wrap(self, self.OVERFLOW if wraps > 0 else self.UNDERFLOW, abs(wraps))
+        return super()._send_wraps(wraps)
+
+    def _exhaust(self, flow):
+        self._stats.exhaustions += 1
+        self._stats._notify("exhaustion", sequence=self, flow=flow)
+        return super()._exhaust(flow)
+
+    def reserve(self, k):
+        result = super().reserve(k)
+        if self.parent is None and len(result) > 0:
+            wraps = (result.stop - 1) // self._length()
+            if wraps > 0:
+                self._stats._wrap(self, self.OVERFLOW, wraps)
+        return result
+
+    def next(self):
+        stats = self._stats
+        start = time.perf_counter()
+        stats.next += 1
+        super().next()
+        stats._time("next", start)
+        return self
+
+    def previous(self):
+        stats = self._stats
+        start = time.perf_counter()
+        stats.previous += 1
+        super().previous()
+        stats._time("previous", start)
+        return self
+
+    def get(self):
+        start = time.perf_counter()
+        result = super().get()
+        self._stats._time("get", start)
+        return result
+
+    def set(self, value):
+        stats = self._stats
+        start = time.perf_counter()
+        try:
+            return super().set(value)
+        finally:
+            stats.sets += 1
+            stats._time("set", start)
+            stats._notify("set", sequence=self, value=value)
+
+    def __reduce_ex__(self, protocol):
+        # the instrumentation is not pickled, the copy is an instance of the original class
+        cls = self._original
+        return cls.__new__, (cls,), self.__getstate__()
+
+
+_CLASSES = {}
+
+
+def _get_class(cls):
+    """
+    :return: the instrumented class of a subclass of Sequences, created once per class.
+    """
+    result = _CLASSES.get(cls)
+    if result is None:
+        result = _CLASSES[cls] = type("Instrumented" + cls.__name__, (InstrumentedMixin, cls),
+                                      {"__slots__": (), "_original": cls})
+    return result
+
+
+InstrumentedSequences = _get_class(Sequences)
+
+
+def _children(sequence):
+    """
+    :return: the sequence and all the instances of Sequences nested in it.
+    """
+    result = [sequence]
+    for nested in sequence._get_nested():
+        result.extend(_children(nested))
+    return result
+
+
+def instrument(sequence, observer=None):
+    """
+    Start counting and timing the calls of a sequence and of the sequences nested in it.
+
+    s = factory("[A-Z]{2}-[0-9]{6}")
+    stats = instrument(s, observer=lambda event, data: print(event, data))
+    s.next().get()
+    stats.snapshot()
+
+    :param sequence: the instance of the class Sequences.
+    :param observer: a function called with the name and the data of each carry, overflow, underflow, exhaustion
+    and set.
+    :return: the instance of the class Stats.
+    """
+    stats = Stats(observer)
+    for seq in _children(sequence):
+        seq._stats = stats
+        if not isinstance(seq, InstrumentedMixin):
+            seq.__class__ = _get_class(type(seq))
+    return stats
+
+
+def uninstrument(sequence):
+    """
+    Stop counting and timing the calls of a sequence.
+    :param sequence: the instance of the class Sequences.
+    :return: the instance of the class Stats with the final counters.
+    """
+    stats = sequence._stats
+    for seq in _children(sequence):
+        seq._stats = None
+        if isinstance(seq, InstrumentedMixin):
+            seq.__class__ = seq._original
+    return stats
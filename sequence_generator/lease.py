@@ -0,0 +1,278 @@
+import itertools
+import json
+import socket
+import socketserver
+import threading
+import time
+
+try:
+    from .exclusion import Exclusion
+    from .sequence import Sequences, factory
+except ImportError:
+    from exclusion import Exclusion
+    from sequence import Sequences, factory
+
+
+class LeaseManager:
+    """
+    Keep the sequences of many named patterns and lease contiguous ranges of positions of them. A lease is valid for
+    ttl seconds and can be renewed or released, a released lease gives back the positions not used, which are leased
+    again before any new position. The positions of a lease that expired without being released are never leased
+    again, as the client may have used any of them. The positions excluded by the exclusion of a series are never
+    leased, so the clients do not need the exclusion.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.series = {}
+        self.leases = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def register(self, name, pattern, first_value=None, direction=Sequences.RIGHT_TO_LEFT, order=None, exclusion=None):
+        """
+        Register a pattern under a name, keeping the current series when the name is already registered.
+        :param exclusion: the positions never leased, an instance of the class Exclusion or a list of intervals.
+        :return: the description of the series.
+        """
+        with self._lock:
+            if name not in self.series:
+                if exclusion is not None and not isinstance(exclusion, Exclusion):
+                    exclusion = Exclusion(exclusion)
+                self.series[name] = {
+                    "pattern": pattern,
+                    "direction": direction,
+                    "order": order,
+                    "sequence": factory(pattern, first_value=first_value, direction=direction, order=order,
+                                        exclusion=exclusion),
+                    "free": [],
+                }
+            return self._describe(name)
+
+    def _describe(self, name):
+        series = self.series[name]
+        return {
+            "name": name,
+            "pattern": series["pattern"],
+            "direction": series["direction"],
+            "order": series["order"],
+        }
+
+    def describe(self, name):
+        """
+        :return: the description of a series, which a client uses to build the same sequence.
+        """
+        with self._lock:
+            return self._describe(name)
+
+    def lease(self, name, count, ttl=None):
+        """
+        Lease the next count positions of a series, or the positions given back by a released lease. The lease has
+        less than count positions when the positions are interrupted by excluded positions.
+        :return: the lease, with its id, the start and stop of its positions and its ttl.
+        """
+        with self._lock:
+            self._expire()
+            series = self.series[name]
+            sequence = series["sequence"]
+            free = series["free"]
+            while True:
+                if len(free) > 0:
+                    start, stop = free.pop(0)
+                    if stop - start > count:
+                        free.insert(0, (start + count, stop))
+                        stop = start + count
+                else:
+                    positions = sequence.reserve(count)
+                    start, stop = positions.start, positions.stop
+                    if start >= stop:
+                        break
+                ranges = list(sequence._get_allowed_ranges(start, stop))
+                if len(ranges) > 0:
+                    start, stop = ranges[0].start, ranges[0].stop
+                    free[0:0] = [(allowed.start, allowed.stop) for allowed in ranges[1:]]
+                    break
+            ttl = self.ttl if ttl is None else ttl
+            lease = {"id": next(self._ids), "name": name, "start": start, "stop": stop, "ttl": ttl}
+            self.leases[lease["id"]] = dict(lease, expires=time.monotonic() + ttl)
+            return lease
+
+    def renew(self, lease_id, ttl=None):
+        """
+        Extend the expiration of a lease.
+        :return: True if the lease was renewed, False if it expired already.
+        """
+        with self._lock:
+            self._expire()
+            lease = self.leases.get(lease_id)
+            if lease is None:
+                return False
+            lease["expires"] = time.monotonic() + (lease["ttl"] if ttl is None else ttl)
+            return True
+
+    def release(self, lease_id, position):
+        """
+        Release a lease, giving back its positions from the given one on.
+        :return: True if the lease was released, False if it expired already.
+        """
+        with self._lock:
+            self._expire()
+            lease = self.leases.pop(lease_id, None)
+            if lease is None:
+                return False
+            position = max(position, lease["start"])
+            if position < lease["stop"]:
+                self.series[lease["name"]]["free"].append((position, lease["stop"]))
+            return True
+
+    def _expire(self):
+        """
+        Reclaim the leases that expired.
+        """
+        now = time.monotonic()
+        for lease_id in [key for key, value in self.leases.items() if value["expires"] <= now]:
+            del self.leases[lease_id]
+
+    def call(self, method, params):
+        """
+        Call a method with the parameters of a request.
+        """
+        if method not in ("register", "describe", "lease", "renew", "release"):
+            raise Exception("Unknown method {method}".format(method=method))
+        return getattr(self, method)(**params)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = {"result": self.server.manager.call(request["method"], request.get("params", {}))}
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def create_server(manager, address):
+    """
+    Create a server answering the requests of the clients with a LeaseManager, one JSON object per line.
+
+    server = create_server(LeaseManager(), ("127.0.0.1", 7000))
+    server.serve_forever()
+
+    :param manager: the instance of the class LeaseManager.
+    :param address: a tuple (host, port) for TCP or a path for an Unix socket.
+    :return: the server.
+    """
+    server_class = _UnixServer if isinstance(address, str) else _TCPServer
+    server = server_class(address, _Handler)
+    server.manager = manager
+    return server
+
+
+class LeaseClient:
+    """
+    A client of a lease server that issues the values of a series locally, leasing count positions at a time, so a
+    request is sent to the server only once every count values. The values are rendered from the positions by a copy
+    of the sequence built from the description of the series.
+
+    s = LeaseClient(("127.0.0.1", 7000), "invoices", count=1000)
+    s.alloc()
+    AA-000000
+    """
+
+    def __init__(self, address, name, count=1000, margin=1.0):
+        self.address = address
+        self.name = name
+        self.count = count
+        self.margin = margin
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.connect(address)
+        self._file = self._socket.makefile("rwb")
+        series = self.call("describe", name=name)
+        self.sequence = factory(series["pattern"], direction=series["direction"], order=series["order"])
+        self.lease = None
+        self.position = None
+        self._values = None
+        self._expires = 0
+
+    def call(self, method, **params):
+        """
+        Send a request to the server.
+        :return: the result of the request.
+        """
+        self._file.write(json.dumps({"method": method, "params": params}).encode() + b"\n")
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        if "error" in response:
+            raise Exception(response["error"])
+        return response["result"]
+
+    def _lease(self):
+        """
+        Lease new positions, the lease is considered expired margin seconds before the server expires it.
+        """
+        expires = time.monotonic()
+        self.lease = self.call("lease", name=self.name, count=self.count)
+        self._expires = expires + self.lease["ttl"] - self.margin
+        self.position = self.lease["start"]
+        self._values = self.sequence.iter_range(self.lease["start"], self.lease["stop"])
+
+    def alloc(self):
+        """
+        :return: the next value of the lease, leasing new positions when the lease is exhausted or expired.
+        """
+        if self.lease is None or self.position >= self.lease["stop"] or time.monotonic() >= self._expires:
+            self._lease()
+        self.position += 1
+        return next(self._values)
+
+    def renew(self):
+        """
+        Extend the expiration of the lease.
+        :return: True if the lease was renewed, False if there is no lease or it expired already.
+        """
+        if self.lease is None or time.monotonic() >= self._expires:
+            return False
+        expires = time.monotonic()
+        if not self.call("renew", lease_id=self.lease["id"]):
+            return False
+        self._expires = expires + self.lease["ttl"] - self.margin
+        return True
+
+    def release(self):
+        """
+        Give back the positions of the lease that were not used.
+        """
+        if self.lease is not None and time.monotonic() < self._expires:
+            self.call("release", lease_id=self.lease["id"], position=self.position)
+        self.lease = None
+
+    def close(self):
+        """
+        Release the lease and close the connection.
+        """
+        try:
+            self.release()
+        finally:
+            self._file.close()
+            self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
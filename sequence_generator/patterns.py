@@ -0,0 +1,163 @@
+_DIGITS = "0123456789"
+_SPECIAL_CHARS = "()|?*+.^${}"
+
+
+def _read_escape(pattern, pos):
+    """
+    Read the escaped character that follows a backslash.
+    :param pattern: the pattern being compiled.
+    :param pos: the position right after the backslash.
+    :return: the characters represented by the escape or None when the escape is not supported.
+    """
+    if pos >= len(pattern):
+        return None
+    char = pattern[pos]
+    if char == 'd':
+        return _DIGITS
+    if char.isalnum():
+        return None
+    return char
+
+
+def _read_class(pattern, pos):
+    """
+    Read a character class like [A-Z0-9].
+    :param pattern: the pattern being compiled.
+    :param pos: the position right after the "[".
+    :return: a tuple with the class characters and the position after the "]" or None when the class is not supported.
+    """
+    n = len(pattern)
+    if pos >= n or pattern[pos] in "^]":
+        return None
+    chars = []
+    while pos < n and pattern[pos] != ']':
+        char = pattern[pos]
+        if char == '\\':
+            char = _read_escape(pattern, pos + 1)
+            if char is None:
+                return None
+            pos += 2
+            if len(char) > 1:
+                chars.extend(char)
+                continue
+        elif char == '[':
+            return None
+        else:
+            pos += 1
+        if pos + 1 < n and pattern[pos] == '-' and pattern[pos + 1] != ']':
+            end, step = pattern[pos + 1], 2
+            if end == '\\':
+                end, step = _read_escape(pattern, pos + 2), 3
+                if end is None or len(end) > 1:
+                    return None
+            if ord(end) < ord(char):
+                return None
+            chars.extend(chr(x) for x in range(ord(char), ord(end) + 1))
+            pos += step
+        else:
+            chars.append(char)
+    if pos >= n:
+        return None
+    return "".join(dict.fromkeys(chars)), pos + 1
+
+
+def _read_repeat(pattern, pos):
+    """
+    Read a fixed quantifier like {3}.
+    :param pattern: the pattern being compiled.
+    :param pos: the position of the "{".
+    :return: a tuple with the number of repetitions and the position after the "}" or None when the quantifier is
+    not a fixed one.
+    """
+    end = pattern.find('}', pos)
+    if end < 0:
+        return None
+    low, comma, high = pattern[pos + 1:end].partition(',')
+    if not low.isdigit() or (comma and high != low):
+        return None
+    return int(low), end + 1
+
+
+def _compile_pattern(pattern):
+    """
+    Compile a pattern made of literals, character classes, ranges, \\d and fixed {n} quantifiers directly into the
+    parts of a Sequences, without generating every string the pattern matches. The parts are the same that the
+    expansion made by _expand_pattern would produce.
+    :param pattern: the pattern to compile.
+    :return: a list of tuples (text, is_sequence), with the constants and the alphabets of the sequences, or None when
+    the pattern uses a construction not supported.
+    """
+    columns = []
+    pos = 0
+    n = len(pattern)
+    while pos < n:
+        char = pattern[pos]
+        if char == '[':
+            value = _read_class(pattern, pos + 1)
+            if value is None:
+                return None
+            column, pos = value
+        elif char == '\\':
+            column = _read_escape(pattern, pos + 1)
+            if column is None:
+                return None
+            pos += 2
+        elif char in _SPECIAL_CHARS:
+            return None
+        else:
+            column = char
+            pos += 1
+        if pos < n and pattern[pos] == '{':
+            value = _read_repeat(pattern, pos)
+            if value is None:
+                return None
+            count, pos = value
+            columns.extend([column] * count)
+        else:
+            columns.append(column)
+
+    if all(len(column) == 1 for column in columns):
+        return [("".join(columns), False)] if len(columns) > 0 else []
+    if len(columns) == 1:
+        return [(columns[0], True)]
+    return [(column, len(column) > 1) for column in columns]
+
+
+def _expand_pattern(pattern):
+    """
+    Build the parts of a Sequences expanding all the strings generated by the regular expression. Only this function
+    needs exrex, so it is imported here.
+    :param pattern: the regular expression.
+    :return: a list of tuples (text, is_sequence).
+    """
+    import exrex
+
+    result = []
+    o = list(exrex.generate(pattern))
+    n = len(o)
+    if n == 1 and len(o[0]) > 0:
+        result.append((o[0], False))
+    elif n > 1 and len(o[0]) == 1:
+        result.append(("".join(o), True))
+    elif n > 1 and len(o[0]) > 1:
+        for y in range(len(o[0])):
+            aux = list(dict.fromkeys(value[y] for value in o))
+            if len(aux) > 0:
+                result.append(("".join(aux), len(aux) > 1))
+    return result
+
+
+def parse(pattern):
+    """
+    Parse a pattern made of parts separated by ";", each part being compiled directly when possible or expanded by
+    exrex otherwise.
+    :param pattern: the pattern.
+    :return: a list of tuples (text, is_sequence), with the constants and the alphabets of the sequences.
+    """
+    result = []
+    for x in pattern.split(";"):
+        values = _compile_pattern(x)
+        if values is None:
+            values = _expand_pattern(x)
+        result.extend(values)
+    return result
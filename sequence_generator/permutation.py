@@ -0,0 +1,162 @@
+import hashlib
+
+try:
+    from .sequence import SequenceExhausted, Sequences
+except ImportError:
+    from sequence import SequenceExhausted, Sequences
+
+
+class Permutation:
+    """
+    Issue the values of a sequence in an order that can not be guessed without the key, like voucher numbers. The
+    counter i is mapped to the position of a value by a keyed Feistel network over the smallest even number of bits that
+    holds the positions, encrypting again while the result is out of the sequence (cycle walking). Each counter gives a
+    different position, so no value is repeated before all of them are issued, and only the key and the counter are
+    kept: the permutation is resumed by creating it again with the same key and the counter saved.
+
+    The positions excluded by the exclusion of the sequence are walked over too, and so are the counters equal to an
+    excluded position, so the counters left are mapped one to one to the positions allowed. The positions allowed are
+    counted when the permutation is created, so the exclusion must not change afterwards.
+
+    s = Permutation(factory("[A-Z]{2}-[0-9]{6}"), key="secret")
+    s.next().get()
+    VY-284664
+    s.counter
+    1
+    """
+
+    def __init__(self, sequence, key, counter=0, rounds=8):
+        self.sequence = sequence
+        self.counter = counter
+        self.rounds = rounds
+        self._size = sequence.size()
+        if self._size <= 0:
+            raise Exception("The sequence has no values to permute")
+        bits = max(2, (self._size - 1).bit_length())
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+        self._width = (self._half + 7) // 8
+        if self._width > 64:
+            raise Exception("The sequence has too many values to permute")
+        self._hash = hashlib.blake2b(key.encode("utf-8") if type(key) == str else key, digest_size=max(8, self._width))
+        self._allowed = self._size
+        if sequence.exclusion is not None:
+            self._allowed -= sequence.exclusion.count(0, self._size)
+
+    def _round(self, number, value):
+        """
+        :return: the keyed hash of a half of the bits, for the given round.
+        """
+        hasher = self._hash.copy()
+        hasher.update(number.to_bytes(1, "big") + value.to_bytes(self._width, "big"))
+        return int.from_bytes(hasher.digest(), "big") & self._mask
+
+    def _encrypt(self, value):
+        left, right = value >> self._half, value & self._mask
+        for number in range(self.rounds):
+            left, right = right, left ^ self._round(number, right)
+        return (left << self._half) | right
+
+    def _decrypt(self, value):
+        left, right = value >> self._half, value & self._mask
+        for number in reversed(range(self.rounds)):
+            left, right = right ^ self._round(number, left), left
+        return (left << self._half) | right
+
+    def _is_out(self, position):
+        """
+        :return: True when the position is out of the sequence or excluded.
+        """
+        exclusion = self.sequence.exclusion
+        return position >= self._size or (exclusion is not None and position in exclusion)
+
+    def permute(self, i):
+        """
+        :param i: the counter, from 0 to the size of the sequence - 1, not excluded.
+        :return: the position of the value issued for the counter.
+        """
+        result = self._encrypt(i % self._size)
+        while self._is_out(result):
+            result = self._encrypt(result)
+        return result
+
+    def invert(self, position):
+        """
+        :param position: the position of a value, as returned by permute.
+        :return: the counter that issues the value.
+        """
+        result = self._decrypt(position)
+        while self._is_out(result):
+            result = self._decrypt(result)
+        return result
+
+    def _skip(self, i):
+        """
+        :return: the first counter from i on that is not excluded.
+        """
+        exclusion = self.sequence.exclusion
+        if exclusion is None:
+            return i
+        cycle, rest = divmod(i, self._size)
+        rest = exclusion.next_allowed(rest)
+        if rest >= self._size:
+            rest = self._size + exclusion.next_allowed(0)
+            if rest >= 2 * self._size:
+                raise SequenceExhausted("All the values of the sequence are excluded")
+        return cycle * self._size + rest
+
+    def nth(self, i):
+        """
+        :return: the value issued for the counter i, without changing the counter.
+        """
+        return self.sequence.nth(self.permute(i))
+
+    def get(self):
+        """
+        :return: the current sequence's value.
+        """
+        return self.sequence.get()
+
+    def _check(self, k):
+        """
+        Apply the RAISE exhaustion policy of the sequence, a permutation starts a new cycle with the other policies.
+        """
+        if self.sequence.exhaustion != Sequences.RAISE:
+            return
+        count = 0
+        if self.counter < self._size:
+            count = self._allowed - self.counter
+            if self.sequence.exclusion is not None:
+                count += self.sequence.exclusion.count_before(self.counter)
+        if k > count:
+            raise SequenceExhausted("The sequence has only {count} values left".format(count=count))
+
+    def next(self):
+        """
+        Move the sequence to the value of the counter and increment the counter.
+        :return: self
+        """
+        self._check(1)
+        counter = self._skip(self.counter)
+        self.sequence.seek(self.permute(counter))
+        self.counter = counter + 1
+        return self
+
+    def take(self, k):
+        """
+        Return the values of the next k counters, leaving the sequence on the last value as if "next" had been called k
+        times.
+        :param k: the number of values to return.
+        :return: a list with the values.
+        """
+        self._check(k)
+        result = []
+        position = None
+        for _ in range(k):
+            counter = self._skip(self.counter)
+            position = self.permute(counter)
+            result.append(self.sequence.nth(position))
+            self.counter = counter + 1
+        if position is not None:
+            self.sequence.seek(position)
+        return result
@@ -0,0 +1,145 @@
+import os
+
+
+class PersistentSequence:
+    """
+    A sequence whose position survives restarts. A high-water mark, the position of the first value that was not
+    reserved, is saved to a file every time the sequence goes past it, so the file is written and synced only once per
+    batch_size positions. After a crash the sequence restarts at the high-water mark, skipping the values of the batch
+    that were not issued, so a value is never issued twice.
+
+    The positions are the ranks of the sequence, counting the cycles of a sequence that wraps, so the values skipped by
+    an exclusion and the values repeated by the SATURATE exhaustion policy are accounted for. A function as exhaustion
+    policy is not supported, as it may change the sequence.
+
+    s = PersistentSequence(factory("[A-Z]{2}-[0-9]{6}"), "invoices.seq", batch_size=1000)
+    s.next().get()
+    AA-000000
+    s.next().get()
+    AA-000001
+    """
+
+    def __init__(self, sequence, path, batch_size=1000):
+        if callable(sequence.exhaustion):
+            raise Exception("A sequence with a function as exhaustion policy can not be persisted")
+        self.sequence = sequence
+        self.path = path
+        self.batch_size = batch_size
+        self._size = sequence._length()
+        limit = self._read()
+        if limit is None:
+            self._cycle = 0
+            self.position = self._get_position()
+            self.limit = self.position
+        else:
+            self._cycle = (limit - 1) // self._size
+            sequence.seek(limit - 1)
+            self.position = self.limit = limit
+
+    def _read(self):
+        """
+        :return: the high-water mark saved in the file or None if the file does not exist.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as file:
+            return int(file.read())
+
+    def _write(self, limit):
+        """
+        Save the high-water mark, replacing the file atomically after syncing it to the disk.
+        :param limit: the position of the first value not reserved.
+        """
+        temp = self.path + '.tmp'
+        with open(temp, 'w') as file:
+            file.write(str(limit))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, self.path)
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _get_position(self):
+        """
+        :return: the position after the current value, counting the cycles of the sequence.
+        """
+        return self._cycle * self._size + self.sequence._get_position() + 1
+
+    def _step(self, function, count):
+        """
+        Advance the sequence and count a new cycle when it wrapped, the count must not be greater than the number of
+        values of a cycle, so the sequence wraps at most once.
+        """
+        rank = self.sequence._get_position()
+        result = function(count)
+        if self.sequence.exhaustion == self.sequence.WRAP and count > 0 and self.sequence._get_position() <= rank:
+            self._cycle += 1
+        return result
+
+    def _reserve(self):
+        """
+        Make sure the current value is below the high-water mark, saving a new one when needed, before the value is
+        issued.
+        """
+        self.position = self._get_position()
+        if self.position <= self.limit:
+            return
+        self.limit = self.position + self.batch_size - 1
+        self._write(self.limit)
+
+    def get(self):
+        """
+        :return: the current sequence's value.
+        """
+        return self.sequence.get()
+
+    def next(self):
+        """
+        Advance to the next sequence.
+        :return: self
+        """
+        self._step(lambda count: self.sequence.next(), 1)
+        self._reserve()
+        return self
+
+    def take(self, k):
+        """
+        Return the next k values.
+        :param k: the number of values to return.
+        :return: a list with the values.
+        """
+        cycle = self._size
+        if self.sequence.exclusion is not None:
+            cycle = max(1, self._size - self.sequence.exclusion.count(0, self._size))
+        result = []
+        while len(result) < k:
+            values = self._step(self.sequence.take, min(k - len(result), cycle))
+            if len(values) <= 0:
+                break
+            result.extend(values)
+        self._reserve()
+        return result
+
+    def close(self):
+        """
+        Save the position after the current value as the high-water mark, so the values reserved but not issued are
+        not skipped when the sequence is created again.
+        """
+        self.position = self._get_position()
+        if self.limit != self.position:
+            self.limit = self.position
+            self._write(self.limit)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
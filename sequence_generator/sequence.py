@@ -1,4 +1,52 @@
-import exrex
+import array
+import functools
+import sys
+
+try:
+    from .patterns import parse
+except ImportError:
+    from patterns import parse
+
+SPEC_CACHE_SIZE = 256
+
+
+class SequenceExhausted(Exception):
+    """
+    Raised when a sequence with the RAISE exhaustion policy has no more values.
+    """
+
+
+class InvalidValue(Exception):
+    """
+    Raised when a value can not be generated by a sequence.
+    """
+
+
+_INDEXES = {}
+
+
+def _get_indexes(alphabet):
+    """
+    :return: a dict with the position of each character of an alphabet, shared by all sequences with the same alphabet.
+    """
+    result = _INDEXES.get(alphabet) if type(alphabet) == str else None
+    if result is None:
+        result = {}
+        for index, char in enumerate(alphabet):
+            result.setdefault(char, index)
+        if type(alphabet) == str:
+            _INDEXES[alphabet] = result
+    return result
+
+
+def _find(alphabet, value):
+    """
+    :return: the position of a character in an alphabet.
+    """
+    index = _get_indexes(alphabet).get(value)
+    if index is None:
+        raise InvalidValue("'{value}' is not one of '{alphabet}'".format(value=value, alphabet=alphabet))
+    return index
 
 
 class Sequence:
@@ -10,14 +58,35 @@ class Sequence:
     The purpose of this class is therefore to return one character at a time, using the character set entered in
     the sequence, and each of the characters entered will be returned at each execution of the "next" and "get" methods.
     When all characters have been returned, a next execution of the "next" and "get" methods will restart the sequence.
+    Once inside a Sequences, the index is kept by the parent with the indexes of the other sequences, and this object is
+    only a view of it.
     """
     OVERFLOW = 0
     UNDERFLOW = 1
 
+    __slots__ = ('sequence', 'parent', '_slot', '_index')
+
     def __init__(self, sequence, parent=None):
-        self.sequence = sequence
-        self.index = -1
+        self.sequence = sys.intern(sequence) if type(sequence) == str else sequence
         self.parent = parent
+        self._slot = None
+        self._index = -1
+
+    @property
+    def index(self):
+        """
+        The position of the current character, -1 when the sequence was not started yet.
+        """
+        if self._slot is None:
+            return self._index
+        return self.parent._indexes[self._slot]
+
+    @index.setter
+    def index(self, value):
+        if self._slot is None:
+            self._index = value
+        else:
+            self.parent._indexes[self._slot] = value
 
     def _send(self, *args, **kwargs):
         """
@@ -48,7 +117,7 @@ class Sequence:
         :return: self
         """
         if self.parent:
-            self.parent._send(self, *args, **kwargs)
+            self.parent._send(self._slot, *args, **kwargs)
         return self
 
     def set(self, value):
@@ -57,15 +126,8 @@ class Sequence:
         :param value: the next sequence.
         :return: self
         """
-        old = self.get()
-        if old == value:
-            return self
-        while True:
-            v = self.next().get()
-            if v == value:
-                return self
-            if v == old:
-                raise Exception("Impossible to set the value")
+        self.seek(self._parse(value))
+        return self
 
     def get(self):
         """
@@ -100,6 +162,81 @@ class Sequence:
         self._send_to_parent(flow=self.OVERFLOW)
         return self
 
+    def _move(self, position):
+        """
+        Move to a position that may be out of this sequence, wrapping it like "next" and "previous" do and sending the
+        number of wraps to the parent, negative for underflows.
+        :param position: the position, relative to the first value.
+        :return: self
+        """
+        wraps, position = divmod(position, self._length())
+        self.seek(position)
+        if wraps != 0:
+            self._send_wraps(wraps)
+        return self
+
+    def _send_wraps(self, wraps):
+        """
+        Send the number of wraps to the parent, as a carry of that many values.
+        """
+        if self.parent:
+            self.parent._carry_wraps(self._slot, wraps)
+
+    def _length(self):
+        """
+        :return: the number of values this sequence can assume.
+        """
+        return len(self.sequence)
+
+    def _get_position(self):
+        """
+        :return: the current index, -1 when the sequence was not started yet.
+        """
+        return self.index
+
+    def _width(self):
+        """
+        :return: the number of characters of a value of this sequence.
+        """
+        return 1
+
+    def rank(self, value=None):
+        """
+        Return the position of a value inside this sequence.
+        :param value: the value to look for, when None the current value is used.
+        :return: the position of the value or None if the value is not part of the sequence.
+        """
+        if value is None:
+            return self.index if self.index >= 0 else 0
+        try:
+            return self._parse(value)
+        except InvalidValue:
+            return None
+
+    def _parse(self, value):
+        """
+        :param value: the value to look for.
+        :return: the position of the value.
+        """
+        return _find(self.sequence, value)
+
+    def nth(self, n):
+        """
+        Return the value at the given position without changing the current sequence.
+        :param n: the position of the value.
+        :return: the value at the position n.
+        """
+        return self.sequence[n % len(self.sequence)]
+
+    def seek(self, n):
+        """
+        Move to the value at the given position.
+        :param n: the position of the value.
+        :return: self
+        """
+        self.index = n % len(self.sequence)
+        return self
+
 
 class Sequences(Sequence):
     """
@@ -128,18 +265,217 @@ class Sequences(Sequence):
         Sequence ("0123456789"),
         Sequence ("0123456789"),
     )
+
+    The exhaustion policy tells what happens when the sequence goes past its last value, or before its first value:
+    WRAP restarts from the other end, RAISE raises SequenceExhausted, SATURATE stays at the last (or first) value, and
+    a function is called with the sequence and the flow, after wrapping, so it can for example widen the sequence.
+
+    The exclusion, an instance of exclusion.Exclusion, holds positions that "next", "previous", "take" and the iteration
+    skip, like the values forbidden or already issued. The methods working with positions, like "reserve", "seek" and
+    "iter_range", do not skip them, "iter_allowed" renders only the positions not excluded of a range reserved.
+
+    The structure of the sequence is kept in a layout shared by all the sequences created from the same pattern, and
+    the indexes of the sequences of characters are packed in an array, so an instance holds no object per position. The
+    list "sequence" is built only when it is used, its sequences of characters being views of the packed indexes.
     """
 
     RIGHT_TO_LEFT = 0
     LEFT_TO_RIGHT = 1
 
-    def __init__(self, sequence, parent=None, direction=RIGHT_TO_LEFT, order=None):
-        super().__init__(sequence, parent)
-        self.indexes = []
-        self.build_indexes()
-        self.direction = direction
-        self.order = self._makeit_plain(order)
+    WRAP = 0
+    RAISE = 1
+    SATURATE = 2
+
+    __slots__ = ('exhaustion', 'exclusion', '_layout', '_indexes', '_children', '_stats')
+
+    def __init__(self, sequence, parent=None, direction=RIGHT_TO_LEFT, order=None, exhaustion=WRAP, exclusion=None):
+        self.parent = parent
+        self._slot = None
+        self.exhaustion = exhaustion
+        self.exclusion = exclusion
+        self._children = [] if sequence is None else sequence
+        self._stats = None
         self.check_order(order)
+        self._set_layout(self._children, direction, self._makeit_plain(order))
+
+    @classmethod
+    def _create(cls, layout, exhaustion=WRAP, exclusion=None):
+        """
+        Create a sequence not started yet from a layout, without any object for the child sequences.
+        :return: the instance of the class.
+        """
+        result = cls.__new__(cls)
+        result.parent = None
+        result._slot = None
+        result.exhaustion = exhaustion
+        result.exclusion = exclusion
+        result._layout = layout
+        result._indexes = array.array(layout.typecode, layout.start)
+        result._children = None
+        result._stats = None
+        return result
+
+    def _set_layout(self, sequence, direction, order):
+        """
+        Build the layout of the child sequences and move their indexes into the packed indexes of this sequence.
+        :param sequence: the constants and the child sequences.
+        """
+        start = [-1 if isinstance(value, Sequences) or not isinstance(value, Sequence) else value.index
+                 for value in sequence]
+        layout = _Layout(sequence, direction, order)
+        self._layout = layout
+        self._indexes = array.array(layout.typecode, start)
+        for idx in layout.indexes:
+            sequence[idx].parent = self
+            sequence[idx]._slot = idx
+
+    @property
+    def sequence(self):
+        """
+        The constants and the child sequences, built on the first use. Setting the list, or calling build_indexes after
+        changing it, builds the layout again.
+        """
+        children = self._children
+        if children is None:
+            children = []
+            leaves = set(self._layout.leaves)
+            for idx, part in enumerate(self._layout.parts):
+                if idx in leaves:
+                    view = Sequence.__new__(Sequence)
+                    view.sequence = part
+                    view.parent = self
+                    view._slot = idx
+                    view._index = -1
+                    part = view
+                children.append(part)
+            self._children = children
+        return children
+
+    @sequence.setter
+    def sequence(self, value):
+        self._children = [] if value is None else value
+        self.build_indexes()
+
+    @property
+    def index(self):
+        """
+        The position of the current value, -1 when the sequence was not started yet. Setting it seeks to the position.
+        """
+        return self._get_position()
+
+    @index.setter
+    def index(self, value):
+        self.seek(value)
+
+    @property
+    def indexes(self):
+        """
+        The indexes of the child sequences in the list "sequence".
+        """
+        return list(self._layout.indexes)
+
+    @property
+    def direction(self):
+        """
+        The direction of the sequence, setting it builds the layout again.
+        """
+        return self._layout.direction
+
+    @direction.setter
+    def direction(self, value):
+        self._set_layout(self.sequence, value, self._layout.order)
+
+    @property
+    def order(self):
+        """
+        The growth order of the sequence, setting it builds the layout again.
+        """
+        order = self._layout.order
+        return None if order is None else list(order)
+
+    @order.setter
+    def order(self, value):
+        self._set_layout(self.sequence, self._layout.direction, self._makeit_plain(value))
+
+    def _get_nested(self):
+        """
+        :return: the instances of Sequences nested in this sequence.
+        """
+        return [self._children[idx] for idx in self._layout.nested]
+
+    def _get_carry(self, idx):
+        """
+        :return: the index of the child sequence that receives the carry of a child sequence, None for the last one.
+        """
+        return self._layout.carries.get(idx)
+
+    def _get_child(self, idx):
+        """
+        :return: the current value of a child sequence, starting it when it was not started yet.
+        """
+        if idx in self._layout.nested:
+            return self._children[idx].get()
+        index = self._indexes[idx]
+        if index < 0:
+            index = self._indexes[idx] = 0
+        return str(self._layout.parts[idx][index])
+
+    def _get_child_position(self, idx):
+        """
+        :return: the position of a child sequence, -1 when it was not started yet.
+        """
+        if idx in self._layout.nested:
+            return self._children[idx]._get_position()
+        return self._indexes[idx]
+
+    def _get_child_rank(self, idx):
+        """
+        :return: the position of a child sequence, 0 when it was not started yet.
+        """
+        if idx in self._layout.nested:
+            return self._children[idx].rank()
+        return max(self._indexes[idx], 0)
+
+    def _next_child(self, idx):
+        """
+        Advance a child sequence, carrying to the next child sequence of the plan when it wraps.
+        """
+        if idx in self._layout.nested:
+            self._children[idx].next()
+            return
+        indexes = self._indexes
+        index = indexes[idx] + 1
+        if index < self._layout.lengths[idx]:
+            indexes[idx] = index
+            return
+        indexes[idx] = 0
+        self._send(idx, flow=self.OVERFLOW)
+
+    def _previous_child(self, idx):
+        """
+        Return a child sequence, carrying to the next child sequence of the plan when it wraps.
+        """
+        if idx in self._layout.nested:
+            self._children[idx].previous()
+            return
+        indexes = self._indexes
+        index = indexes[idx] - 1
+        if index >= 0:
+            indexes[idx] = index
+            return
+        indexes[idx] = self._layout.lengths[idx] - 1
+        self._send(idx, flow=self.UNDERFLOW)
+
+    def _move_child(self, idx, position):
+        """
+        Move a child sequence to a position that may be out of it, carrying the wraps.
+        """
+        if idx in self._layout.nested:
+            self._children[idx]._move(position)
+            return
+        wraps, self._indexes[idx] = divmod(position, self._layout.lengths[idx])
+        if wraps != 0:
+            self._carry_wraps(idx, wraps)
 
     def check_order(self, order):
         if self.sequence is None or len(self.sequence) <= 0:
@@ -153,7 +489,8 @@ class Sequences(Sequence):
                 continue
             seq = self.sequence[o]
             if not isinstance(seq, Sequence):
-                raise Exception(msg.format(index=o, values=self.indexes))
+                indexes = [idx for idx, value in enumerate(self.sequence) if isinstance(value, Sequence)]
+                raise Exception(msg.format(index=o, values=indexes))
 
     def _makeit_plain(self, values):
         if values is None or len(values) <= 0:
@@ -179,14 +516,14 @@ class Sequences(Sequence):
         :return: all sequences from this sequence.
         """
         def inner(seq, result=[]):
-            if isinstance(seq, Sequences):
-                for s in seq.sequence:
-                    inner(s, result)
-            elif isinstance(seq, Sequence):
-                if len(seq.sequence.strip()) > 1:
+            layout = seq._layout
+            for idx in layout.indexes:
+                if idx in layout.nested:
+                    inner(seq._children[idx], result)
+                elif len(layout.parts[idx].strip()) > 1:
                     result.append({
-                        "sequence": seq.sequence,
-                        "index": seq.index,
+                        "sequence": layout.parts[idx],
+                        "index": seq._indexes[idx],
                     })
             return result
         return inner(self, [])
@@ -195,45 +532,62 @@ class Sequences(Sequence):
         """
         :return: the number of sequences possibles to generate.
         """
-        sequences = self.get_sequences()
-        if sequences is None or len(sequences) <= 0:
+        if len(self._layout.plan) <= 0:
             return 0
-        result = 1
-        for seq in sequences:
-            result *= len(seq['sequence'])
-        return result
+        return self._length()
 
     def distance_to_last(self):
         """
         :return: the distance from the current sequence to the last sequence.
         """
-        result = 0
-        sequences = self.get_sequences()
-        n = len(sequences)
-        if sequences is None or n <= 0:
+        if len(self._layout.plan) <= 0:
             return 0
-        for i, v in enumerate(sequences):
-            index = v['index']
-            if index < 0:
-                index = 0
-            offset = len(v['sequence']) - index - 1
-            if i < (n - 1):
-                r = offset
-                for k in range((i + 1), n):
-                    r *= len(sequences[k]['sequence'])
-                result += r
-            else:
-                result += offset
+        return self._length() - 1 - self.rank()
+
+    def distance_to_first(self):
+        """
+        :return: the distance from the first sequence to the current sequence.
+        """
+        if len(self._layout.plan) <= 0:
+            return 0
+        return self.rank()
+
+    def count_left(self):
+        """
+        :return: the number of values "next" can still return before the last value, the excluded ones not counted.
+        """
+        if len(self._layout.plan) <= 0:
+            return 0
+        start = self._get_position() + 1
+        result = self._length() - start
+        if self.exclusion is not None and result > 0:
+            result -= self.exclusion.count(start, self._length())
         return result
 
+    def distance(self, a, b):
+        """
+        Return how many "next" are needed to go from a value to another, negative when the second value comes first.
+        :param a: the first value.
+        :param b: the second value.
+        :return: the distance between the values or None if any of them can not be generated by this sequence.
+        """
+        rank_a = self.rank(a)
+        rank_b = self.rank(b)
+        if rank_a is None or rank_b is None:
+            return None
+        return rank_b - rank_a
+
     def last(self):
         """
         Advance to the last sequence.
         :return: self
         """
-        self.index = len(self.sequence) - 1
-        for index, idx in enumerate(self.indexes):
-            self.sequence[idx].last()
+        layout = self._layout
+        for idx in layout.indexes:
+            if idx in layout.nested:
+                self._children[idx].last()
+            else:
+                self._indexes[idx] = layout.lengths[idx] - 1
         return self
 
     def first(self):
@@ -241,143 +595,913 @@ class Sequences(Sequence):
         Return to the first sequence.
         :return: self
         """
-        self.index = 0
-        for index, idx in enumerate(self.indexes):
-            self.sequence[idx].first()
+        layout = self._layout
+        for idx in layout.indexes:
+            if idx in layout.nested:
+                self._children[idx].first()
+            else:
+                self._indexes[idx] = 0
         return self
 
     def build_indexes(self):
-        if self.sequence is None or len(self.sequence) <= 0:
-            return
-        self.indexes = []
-        for index, value in enumerate(self.sequence):
-            if not isinstance(value, Sequence):
-                continue
-            value.parent = self
-            self.indexes.append(index)
-
-    def _index_of(self, sequence, indexes):
-        for index, idx in enumerate(indexes):
-            if self.sequence[idx] == sequence:
-                return index
-        return None
-
-    def _index_of_order(self, sequence, order):
-        result1 = result2 = result3 = result4 = None
-
-        def inner(values):
-            nonlocal result1, result2, result3, result4
-            for index, idx in enumerate(values):
-                if type(idx) == list:
-                    r1, r2, r3, r4 = inner(idx)
-                    if result1 is None:
-                        result1 = r1
-                    if result1 is not None and result2 is None:
-                        result2 = r2
-                    if result1 is not None and result3 is None:
-                        result3 = r3 or index if len(values) > 1 else None
-                    if result1 is not None and result4 is None:
-                        result4 = r4 or order if len(values) > 1 else None
-                elif self.sequence[idx] == sequence:
-                    result1 = index
-                    result2 = values
-                    return result1, result2, result3, result4
-            return result1, result2, result3, result4
-        inner(order)
-        return result1, result2, result3, result4
+        """
+        Build the layout again from the list "sequence", after it was changed.
+        """
+        self._set_layout(self.sequence, self._layout.direction, self._layout.order)
 
     def _send(self, *args, **kwargs):
         """
         Send a message to this class.
         :return: self
         """
-        size = len(self.indexes)
-        if size <= 0:
+        if len(self._layout.indexes) <= 0:
             return self
 
         flow = kwargs.get('flow')
-        sequence = args[0]
-
-        method_name = "next" if flow == self.OVERFLOW else "previous"
-        index = self._index_of(sequence, self.indexes)
-
-        if self.order and len(self.order) > 0:
-            index, order, group_index, group_values = self._index_of_order(sequence, self.order)
-            if index is not None and order is not None and index < (len(order) - 1):
-                sequence = self.sequence[order[index + 1]]
-                getattr(sequence, method_name)()
-                return self
-            elif group_index is not None and group_index < (len(group_values) - 1):
-                order = group_values[group_index + 1]
-                index = self._get_first_value_from_order(order)
-                sequence = self.sequence[index]
-                getattr(sequence, method_name)()
-                return self
-        else:
-            if self.direction == self.RIGHT_TO_LEFT:
-                if index > 0:
-                    sequence = self.sequence[self.indexes[index - 1]]
-                    getattr(sequence, method_name)()
-                    return self
-            elif self.direction == self.LEFT_TO_RIGHT:
-                if index < (len(self.indexes) - 1):
-                    sequence = self.sequence[self.indexes[index + 1]]
-                    getattr(sequence, method_name)()
-                    return self
+        idx = self._get_carry(args[0])
+        if idx is not None:
+            if flow == self.OVERFLOW:
+                self._next_child(idx)
+            else:
+                self._previous_child(idx)
+            return self
+        if self.parent is None and self.exhaustion != self.WRAP:
+            self._exhaust(flow)
+            return self
         self._send_to_parent(flow=flow)
         return self
 
-    def get(self):
+    def _carry_wraps(self, sequence, wraps):
         """
-        :return: the current sequence's value.
+        Carry the wraps of a child sequence to the next child sequence of the plan, as _send does for a single wrap.
+        :param sequence: the index of the child sequence that wrapped.
+        :param wraps: the number of wraps, negative for underflows.
+        """
+        idx = self._get_carry(sequence)
+        if idx is None:
+            self._send_wraps(wraps)
+        elif wraps > 0:
+            self._move_child(idx, self._get_child_position(idx) + wraps)
+        else:
+            self._move_child(idx, self._get_child_rank(idx) + wraps)
+
+    def _send_wraps(self, wraps):
+        if self.parent is None:
+            if self.exhaustion != self.WRAP:
+                self._exhaust(self.OVERFLOW if wraps > 0 else self.UNDERFLOW)
+            return
+        super()._send_wraps(wraps)
+
+    def _exhaust(self, flow):
+        """
+        Apply the exhaustion policy, the sequence has already wrapped to the other end.
+        :param flow: OVERFLOW when the sequence went past its last value, UNDERFLOW when it went before its first value.
+        """
+        if callable(self.exhaustion):
+            self.exhaustion(self, flow)
+            return
+        if self.exclusion is None:
+            self.seek(-1 if flow == self.OVERFLOW else 0)
+        elif flow == self.OVERFLOW:
+            self.seek(self._get_allowed(self._length() - 1, -1))
+        else:
+            self.seek(self._get_allowed(0, 1))
+        if self.exhaustion == self.RAISE:
+            raise SequenceExhausted("The sequence has no {which} value".format(
+                which="next" if flow == self.OVERFLOW else "previous"))
+
+    def _get_plan(self):
+        """
+        :return: the indexes of the child sequences, from the one that changes most often to the one that changes least
+        often.
+        """
+        return self._layout.plan
+
+    def _get_sizes(self):
+        """
+        :return: the number of values of each child sequence in the plan, computed once per structure.
+        """
+        return self._layout.sizes
+
+    def _length(self):
+        """
+        :return: the number of values this sequence can assume.
+        """
+        return self._layout.size
+
+    def _width(self):
+        """
+        :return: the number of characters of a value of this sequence.
+        """
+        return self._layout.width
+
+    def _get_digits(self, n):
+        """
+        Decompose a position in the digits of each child sequence.
+        :param n: the position.
+        :return: a dict with the index of the child sequence as key and its position as value.
+        """
+        result = {}
+        n %= self._length()
+        for idx, size in zip(self._layout.plan, self._layout.sizes):
+            result[idx] = n % size
+            n //= size
+        return result
+
+    def rank(self, value=None):
+        """
+        Return the position of a value inside this sequence, i.e. how many "next" are needed to reach this value
+        starting from the first value.
+        :param value: the value to look for, when None the current value is used.
+        :return: the position of the value or None if the value can not be generated by this sequence.
+        """
+        if value is not None:
+            try:
+                return self._parse(value)
+            except InvalidValue:
+                return None
+        layout = self._layout
+        indexes = self._indexes
+        result = 0
+        for idx, size in zip(reversed(layout.plan), reversed(layout.sizes)):
+            if idx in layout.nested:
+                index = self._children[idx].rank()
+            else:
+                index = indexes[idx]
+                if index < 0:
+                    index = 0
+            result = result * size + index
+        return result
+
+    def _parse(self, value):
+        """
+        Check each position of a value against its constant or alphabet.
+        :param value: the value to look for.
+        :return: the position of the value.
         """
+        if len(value) != self._width():
+            raise InvalidValue("'{value}' must have {width} characters".format(value=value, width=self._width()))
+        layout = self._layout
+        plan = layout.plan
+        digits = {}
+        offset = 0
+        for idx, part in enumerate(layout.parts):
+            if idx not in layout.carries:
+                if value[offset:offset + len(part)] != part:
+                    raise InvalidValue("'{value}' must have '{constant}' at position {offset}".format(
+                        value=value, constant=part, offset=offset))
+                offset += len(part)
+                continue
+            nested = self._children[idx] if idx in layout.nested else None
+            width = 1 if nested is None else nested._width()
+            try:
+                if nested is None:
+                    digit = _find(part, value[offset:offset + 1])
+                else:
+                    digit = nested._parse(value[offset:offset + width])
+            except InvalidValue as e:
+                raise InvalidValue("'{value}' is invalid at position {offset}: {error}".format(
+                    value=value, offset=offset, error=e))
+            if idx not in plan and digit != self._get_child_rank(idx):
+                raise InvalidValue("'{value}' must have '{current}' at position {offset}".format(
+                    value=value, current=self._get_child(idx), offset=offset))
+            digits[idx] = digit
+            offset += width
+        result = 0
+        for idx, size in zip(reversed(plan), reversed(self._get_sizes())):
+            result = result * size + digits[idx]
+        return result
+
+    def _get_checks(self, offset=0, weight=1):
+        """
+        Build the checks of each part of a value, used to validate many values at once.
+        :param offset: the position of the first character of this sequence inside the value.
+        :param weight: the weight of the position of this sequence inside the rank of the value.
+        :return: a list of tuples (offset, constant, indexes, weight), with the constant expected at the offset or, when
+        constant is None, the map of the characters allowed at the offset and the weight of their positions in the rank.
+        """
+        weights = {}
+        for idx, size in zip(self._get_plan(), self._get_sizes()):
+            weights[idx] = weight
+            weight *= size
+        layout = self._layout
+        result = []
+        for idx, part in enumerate(layout.parts):
+            if idx not in layout.carries:
+                result.append((offset, part, None, 0))
+                offset += len(part)
+            elif idx not in weights:
+                text = self._get_child(idx)
+                result.append((offset, text, None, 0))
+                offset += len(text)
+            elif idx in layout.nested:
+                result.extend(self._children[idx]._get_checks(offset, weights[idx]))
+                offset += self._children[idx]._width()
+            else:
+                result.append((offset, None, _get_indexes(part), weights[idx]))
+                offset += 1
+        return result
+
+    def contains(self, value):
+        """
+        :param value: the value to look for.
+        :return: True if the value can be generated by this sequence, False for anything but a string.
+        """
+        if not isinstance(value, str):
+            return False
+        try:
+            self._parse(value)
+        except (InvalidValue, TypeError):
+            return False
+        return True
+
+    def __contains__(self, value):
+        return self.contains(value)
+
+    def validate(self, values):
+        """
+        Validate many values, checking their length, constants and alphabets through lookup tables built once.
+        :param values: an iterable of values.
+        :return: a generator with the rank of each value, or None for the values that can not be generated.
+        """
+        checks = self._get_checks()
+        width = self._width()
+        for value in values:
+            if len(value) != width:
+                yield None
+                continue
+            rank = 0
+            for offset, constant, indexes, weight in checks:
+                if indexes is None:
+                    if not value.startswith(constant, offset):
+                        rank = None
+                        break
+                else:
+                    digit = indexes.get(value[offset])
+                    if digit is None:
+                        rank = None
+                        break
+                    rank += digit * weight
+            yield rank
+
+    def nth(self, n):
+        """
+        Return the value at the given position without changing the current sequence.
+        :param n: the position of the value.
+        :return: the value at the position n.
+        """
+        digits = self._get_digits(n)
+        layout = self._layout
         result = ''
-        for value in self.sequence:
-            if isinstance(value, Sequence):
-                result += str(value.get())
+        for idx, part in enumerate(layout.parts):
+            if idx in digits:
+                if idx in layout.nested:
+                    result += self._children[idx].nth(digits[idx])
+                else:
+                    result += str(part[digits[idx]])
+            elif idx in layout.carries:
+                result += self._get_child(idx)
             else:
-                result += value
+                result += part
         return result
 
+    def seek(self, n):
+        """
+        Move to the value at the given position, the next value will be the one at the position n + 1.
+        :param n: the position of the value.
+        :return: self
+        """
+        layout = self._layout
+        indexes = self._indexes
+        n %= layout.size
+        for idx, size in zip(layout.plan, layout.sizes):
+            n, digit = divmod(n, size)
+            if idx in layout.nested:
+                self._children[idx].seek(digit)
+            else:
+                indexes[idx] = digit
+        for idx in layout.fixed:
+            self._get_child(idx)
+        return self
+
+    def _get_position(self):
+        """
+        :return: the position of the current value, or the position before the first value when the sequence was not
+        started yet, so the next value is always at the returned position + 1.
+        """
+        plan = self._layout.plan
+        if len(plan) <= 0:
+            return 0
+        if plan[0] in self._layout.nested:
+            first = self._children[plan[0]]
+            return self.rank() + first._get_position() - first.rank()
+        if self._indexes[plan[0]] < 0:
+            return self.rank() - 1
+        return self.rank()
+
+    def _generate(self, start, count, step=1):
+        """
+        Generate the values starting at a position, adding the digits of the step to the digits of the child sequences
+        like an odometer, so each value costs the same whatever the step is.
+        :param start: the position of the first value.
+        :param count: the number of values to generate.
+        :param step: the distance between two generated values, may be negative.
+        :return: a generator of values.
+        """
+        layout = self._layout
+        plan = layout.plan
+        sequences = [self._children[idx].nth if idx in layout.nested else layout.parts[idx].__getitem__ for idx in plan]
+        sizes = layout.sizes
+        digits = self._get_digits(start)
+        state = [digits[idx] for idx in plan]
+        steps = self._get_digits(step)
+        steps = [steps[idx] for idx in plan]
+        parts = []
+        for idx, part in enumerate(layout.parts):
+            if idx in digits:
+                parts.append(str(sequences[plan.index(idx)](digits[idx])))
+            elif idx in layout.carries:
+                parts.append(self._get_child(idx))
+            else:
+                parts.append(part)
+        n = len(plan)
+        top = n
+        while top > 0 and steps[top - 1] == 0:
+            top -= 1
+        for x in range(count):
+            yield "".join(parts)
+            carry = 0
+            i = 0
+            while i < n and (i < top or carry):
+                digit = state[i] + steps[i] + carry
+                carry = 0
+                if digit >= sizes[i]:
+                    digit -= sizes[i]
+                    carry = 1
+                if digit != state[i]:
+                    state[i] = digit
+                    parts[plan[i]] = str(sequences[i](digit))
+                i += 1
+
+    def iter_range(self, start, stop, step=1):
+        """
+        Iterate over the values whose positions are in range(start, stop, step), without changing the current sequence.
+        :param start: the position of the first value.
+        :param stop: the position where the iteration stops, not included.
+        :param step: the distance between two values, may be negative.
+        :return: a generator of values.
+        """
+        return self._generate(start, len(range(start, stop, step)), step)
+
+    def _get_allowed_ranges(self, start, stop):
+        """
+        Split a range of positions in the ranges of positions not excluded, the positions past the last value wrapping
+        to the first value like the positions returned by "reserve".
+        :param start: the first position.
+        :param stop: the position after the last one.
+        :return: a generator of ranges.
+        """
+        if self.exclusion is None:
+            if start < stop:
+                yield range(start, stop)
+            return
+        size = self._length()
+        if self.exclusion.next_allowed(0) >= size:
+            raise SequenceExhausted("All the values of the sequence are excluded")
+        position = start
+        while position < stop:
+            offset = position - position % size
+            end = min(stop, offset + size)
+            allowed = self.exclusion.next_allowed(position - offset) + offset
+            if allowed >= end:
+                position = end
+                continue
+            excluded = self.exclusion.next_excluded(allowed - offset)
+            excluded = end if excluded is None else min(end, excluded + offset)
+            yield range(allowed, excluded)
+            position = excluded
+
+    def iter_allowed(self, start, stop):
+        """
+        Iterate over the values not excluded whose positions are in range(start, stop), like the range returned by
+        "reserve", without changing the current sequence.
+        :param start: the position of the first value.
+        :param stop: the position where the iteration stops, not included.
+        :return: a generator of values.
+        """
+        for positions in self._get_allowed_ranges(start, stop):
+            yield from self._generate(positions.start, len(positions))
+
+    def __iter__(self):
+        """
+        Iterate over all values, from the first to the last one, without changing the current sequence.
+        """
+        if self.exclusion is not None:
+            return self._iter_allowed(0, self._length(), 1)
+        return self.iter_range(0, self._length())
+
+    def __reversed__(self):
+        """
+        Iterate over all values, from the last to the first one, without changing the current sequence.
+        """
+        if self.exclusion is not None:
+            return self._iter_allowed(self._length() - 1, -1, -1)
+        return self.iter_range(self._length() - 1, -1, -1)
+
+    def _iter_allowed(self, start, stop, step):
+        """
+        Iterate over the values not excluded, generating each run of positions between two excluded intervals at once.
+        :param start: the position of the first value.
+        :param stop: the position after the last value.
+        :param step: 1 to go forward, -1 to go backward.
+        """
+        position = start
+        while position * step < stop * step:
+            if step > 0:
+                position = self.exclusion.next_allowed(position)
+                end = self.exclusion.next_excluded(position)
+                end = stop if end is None else min(end, stop)
+            else:
+                position = self.exclusion.previous_allowed(position)
+                end = self.exclusion.previous_excluded(position)
+                end = stop if end is None else max(end, stop)
+            if (end - position) * step <= 0:
+                return
+            yield from self._generate(position, abs(end - position), step)
+            position = end
+
+    def reserve(self, k):
+        """
+        Reserve the next k values, advancing the sequence as if "next" had been called k times.
+        :param k: the number of values to reserve.
+        :return: a range with the positions of the reserved values, use "nth" to get each value. With the RAISE
+        exhaustion policy SequenceExhausted is raised when there are less than k values left, with the SATURATE policy
+        and with a function only the values left are reserved, the function being called first when there are none.
+        """
+        start = self._get_position() + 1
+        if k <= 0:
+            return range(start, start)
+        if self.parent is None and self.exhaustion != self.WRAP:
+            size = self._length()
+            if start >= size and callable(self.exhaustion):
+                self.next()
+                start = self._get_position()
+                return range(start, self.reserve(k - 1).stop)
+            if start + k > size:
+                if self.exhaustion == self.RAISE:
+                    raise SequenceExhausted("The sequence has only {count} values left".format(count=size - start))
+                k = size - start
+                if k <= 0:
+                    return range(start, start)
+        self.seek(start + k - 1)
+        return range(start, start + k)
+
+    def take(self, k):
+        """
+        Return the next k values, advancing the sequence as if "next" had been called k times.
+        :param k: the number of values to return.
+        :return: a list with the values.
+        """
+        if self.exclusion is not None:
+            return self._take_allowed(k)
+        result = []
+        while len(result) < k:
+            positions = self.reserve(k - len(result))
+            if len(positions) <= 0:
+                break
+            result.extend(self._generate(positions.start, len(positions)))
+        return result
+
+    def _take_allowed(self, k):
+        """
+        Return the next k values not excluded, generating each run of positions between two excluded intervals at once
+        and using "next" only to wrap around. With the RAISE exhaustion policy SequenceExhausted is raised before any
+        value is generated when there are less than k values left.
+        """
+        if self.parent is None and self.exhaustion == self.RAISE:
+            count = self.count_left()
+            if k > count:
+                raise SequenceExhausted("The sequence has only {count} values left".format(count=count))
+        result = []
+        while len(result) < k:
+            position = self._get_position()
+            start = self.exclusion.next_allowed(position + 1)
+            if start >= self._length():
+                result.append(self.next().get())
+                if self._get_position() == position:
+                    result.pop()
+                    break
+                continue
+            stop = self.exclusion.next_excluded(start)
+            stop = min(self._length(), start + k - len(result), self._length() if stop is None else stop)
+            result.extend(self._generate(start, stop - start))
+            self.seek(stop - 1)
+        return result
+
+    def _get_leaves(self):
+        """
+        :return: the sequences of characters of this sequence and of the sequences nested in it, in the pattern order,
+        as tuples with the sequence that keeps the index and the index of the sequence of characters in it.
+        """
+        result = []
+        for idx in self._layout.indexes:
+            if idx in self._layout.nested:
+                result.extend(self._children[idx]._get_leaves())
+            else:
+                result.append((self, idx))
+        return result
+
+    def _describe(self):
+        """
+        :return: the structure of this sequence as plain lists and dicts, enough to build the same sequence again.
+        """
+        layout = self._layout
+        sequence = []
+        for idx, part in enumerate(layout.parts):
+            if idx in layout.nested:
+                sequence.append(self._children[idx]._describe())
+            elif idx in layout.carries:
+                sequence.append([part])
+            else:
+                sequence.append(part)
+        return {"sequence": sequence, "direction": layout.direction, "order": layout.order}
+
+    @staticmethod
+    def _build(description):
+        """
+        Build a sequence from the structure returned by _describe.
+        :return: the instance of the class Sequences.
+        """
+        sequence = []
+        for value in description["sequence"]:
+            if isinstance(value, dict):
+                sequence.append(Sequences._build(value))
+            elif isinstance(value, list):
+                sequence.append(Sequence(value[0]))
+            else:
+                sequence.append(value)
+        return Sequences(sequence, direction=description["direction"], order=description["order"])
+
+    def _get_digest(self):
+        """
+        :return: a hash of 8 bytes of the structure of this sequence.
+        """
+        # imported here, json and hashlib are not needed by the sequences that are never saved
+        import hashlib
+        import json
+
+        text = json.dumps(self._describe(), sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+    def snapshot(self):
+        """
+        Save the current state in a few bytes: the hash of the structure followed by the index of every sequence of
+        characters, packed in a single number. The state is loaded back by restore, on a sequence with the same
+        structure.
+        :return: the bytes of the snapshot.
+        """
+        state = 0
+        for sequence, idx in self._get_leaves():
+            state = state * (sequence._layout.lengths[idx] + 1) + sequence._indexes[idx] + 1
+        return self._get_digest() + state.to_bytes((state.bit_length() + 7) // 8, "big")
+
+    def restore(self, snapshot):
+        """
+        Load a state saved by snapshot.
+        :param snapshot: the bytes of the snapshot.
+        :return: self
+        """
+        if bytes(snapshot[:8]) != self._get_digest():
+            raise InvalidValue("The snapshot was not taken from a sequence with this structure")
+        state = int.from_bytes(snapshot[8:], "big")
+        for sequence, idx in reversed(self._get_leaves()):
+            state, index = divmod(state, sequence._layout.lengths[idx] + 1)
+            sequence._indexes[idx] = index - 1
+        if state != 0:
+            raise InvalidValue("The snapshot has more indexes than the sequence")
+        return self
+
+    def __getstate__(self):
+        return {
+            "structure": self._describe(),
+            "exhaustion": self.exhaustion,
+            "exclusion": self.exclusion,
+            "snapshot": self.snapshot(),
+        }
+
+    def __setstate__(self, state):
+        prototype = self._build(state["structure"])
+        self.__init__(prototype.sequence, direction=prototype.direction, order=prototype.order,
+                      exhaustion=state["exhaustion"], exclusion=state.get("exclusion"))
+        self.restore(state["snapshot"])
+
+    def get(self):
+        """
+        :return: the current sequence's value.
+        """
+        layout = self._layout
+        indexes = self._indexes
+        alphabets = layout.parts
+        parts = list(layout.constants)
+        for idx in layout.leaves:
+            index = indexes[idx]
+            if index < 0:
+                index = indexes[idx] = 0
+            parts[idx] = alphabets[idx][index]
+        if not layout.strings:
+            for idx in layout.leaves:
+                parts[idx] = str(parts[idx])
+        for idx in layout.nested:
+            parts[idx] = self._children[idx].get()
+        return "".join(parts)
+
+    def get_bytes(self, encoding="utf-8"):
+        """
+        :param encoding: the encoding of the value.
+        :return: the current sequence's value as bytes.
+        """
+        return self.get().encode(encoding)
+
     def previous(self):
         """
         Return to the previous sequence.
         :return: self
         """
-        if len(self.indexes) > 0:
-            self._get_sequence_to_advance().previous()
+        plan = self._layout.plan
+        if len(plan) > 0:
+            if self.exclusion is not None:
+                return self._move(self._get_allowed(self.rank() - 1, -1))
+            self._previous_child(plan[0])
         return self
 
-    def _get_first_value_from_order(self, order):
-        if order is None or len(order) <= 0:
-            return None
-        result = order[0]
-        if type(result) == list:
-            return self._get_first_value_from_order(result)
-        return result
+    def advance(self, n):
+        """
+        Advance n values at once, as if "next" had been called n times, adding n to the digits of the child sequences
+        instead of stepping. With an exhaustion policy other than WRAP the policy is applied once when the last value is
+        passed, a function being called once however many times the sequence wrapped. The excluded values are not
+        counted, like "next" skips them.
+        :param n: the number of values, a negative number retreats.
+        :return: self
+        """
+        if n < 0:
+            return self.retreat(-n)
+        if n > 0 and len(self._layout.plan) > 0:
+            position = self._get_position()
+            if self.exclusion is not None:
+                return self._move_allowed(position - self.exclusion.count(0, position + 1) + n)
+            self._move(position + n)
+        return self
 
-    def _get_sequence_to_advance(self):
-        if self.order and len(self.order) > 0:
-            index = self._get_first_value_from_order(self.order)
-            return self.sequence[index]
-        elif self.direction == self.RIGHT_TO_LEFT:
-            return self.sequence[self.indexes[-1]]
-        elif self.direction == self.LEFT_TO_RIGHT:
-            return self.sequence[self.indexes[0]]
-        return None
+    def retreat(self, n):
+        """
+        Return n values at once, as if "previous" had been called n times, the excluded values not being counted.
+        :param n: the number of values, a negative number advances.
+        :return: self
+        """
+        if n < 0:
+            return self.advance(-n)
+        if n > 0 and len(self._layout.plan) > 0:
+            position = self.rank()
+            if self.exclusion is not None:
+                return self._move_allowed(position - self.exclusion.count(0, position) - n)
+            self._move(position - n)
+        return self
+
+    def _move_allowed(self, rank):
+        """
+        Move to a value given by its rank among the values not excluded, wrapping like _move.
+        :param rank: the number of values not excluded before the value, may be out of the sequence.
+        :return: self
+        """
+        size = self._length()
+        count = size - self.exclusion.count(0, size)
+        if count <= 0:
+            raise SequenceExhausted("All the values of the sequence are excluded")
+        wraps, rank = divmod(rank, count)
+        return self._move(wraps * size + self.exclusion.nth_allowed(rank))
 
     def next(self):
         """
         Advance to the next sequence.
         :return: self
         """
-        if len(self.indexes) > 0:
-            sequence = self._get_sequence_to_advance()
-            sequence.next()
+        plan = self._layout.plan
+        if len(plan) > 0:
+            if self.exclusion is not None:
+                return self._move(self._get_allowed(self._get_position() + 1, 1))
+            self._next_child(plan[0])
         return self
 
+    def _get_allowed(self, position, step):
+        """
+        Find the first position not excluded from a position on, going forward or backward and wrapping around.
+        :param position: the position, from -1 to the number of values.
+        :param step: 1 to go forward, -1 to go backward.
+        :return: the position found, out of the sequence when it wrapped, so _move reports the wrap.
+        """
+        size = self._length()
+        if step > 0:
+            result = self.exclusion.next_allowed(position)
+            if result >= size:
+                result = size + self.exclusion.next_allowed(0)
+        else:
+            result = self.exclusion.previous_allowed(position)
+            if result < 0:
+                result = self.exclusion.previous_allowed(size - 1) - size
+        if result >= 2 * size or result < -size:
+            raise SequenceExhausted("All the values of the sequence are excluded")
+        return result
+
 
-def factory(pattern, first_value=None, direction=Sequences.RIGHT_TO_LEFT, order=None):
+class _Layout:
+    """
+    The structure of a Sequences: its constants, the alphabets of its sequences of characters, the plan of the carries
+    and the number of values of each child sequence. A layout never changes, so it is shared by all the sequences
+    created from the same spec, each of them keeping only the indexes of its sequences of characters.
+    """
+
+    __slots__ = ('parts', 'constants', 'lengths', 'indexes', 'leaves', 'nested', 'direction', 'order', 'plan', 'fixed',
+                 'carries', 'sizes', 'size', 'width', 'start', 'typecode', 'strings')
+
+    def __init__(self, sequence, direction, order):
+        """
+        :param sequence: the constants and the child sequences.
+        :param direction: the direction of the sequence.
+        :param order: the plain order of the child sequences, or None.
+        """
+        self.parts = []
+        self.lengths = []
+        self.indexes = []
+        self.leaves = []
+        self.nested = []
+        self.width = 0
+        for idx, value in enumerate(sequence):
+            if isinstance(value, Sequences):
+                self.parts.append(None)
+                self.lengths.append(value._length())
+                self.nested.append(idx)
+                self.width += value._width()
+            elif isinstance(value, Sequence):
+                self.parts.append(value.sequence)
+                self.lengths.append(len(value.sequence))
+                self.leaves.append(idx)
+                self.width += 1
+            else:
+                self.parts.append(value)
+                self.lengths.append(0)
+                self.width += len(value)
+                continue
+            self.indexes.append(idx)
+        self.constants = list(self.parts)
+        for idx in self.indexes:
+            self.constants[idx] = None
+        self.direction = direction
+        self.order = order
+        if order and len(order) > 0:
+            plan = list(order)
+        elif direction == Sequences.LEFT_TO_RIGHT:
+            plan = list(self.indexes)
+        else:
+            plan = list(reversed(self.indexes))
+        self.plan = plan
+        planned = set(plan)
+        self.fixed = [idx for idx in self.indexes if idx not in planned]
+        self.carries = dict.fromkeys(self.indexes)
+        for index in range(len(plan) - 1):
+            self.carries[plan[index]] = plan[index + 1]
+        self.sizes = [self.lengths[idx] for idx in plan]
+        self.size = 1
+        for size in self.sizes:
+            self.size *= size
+        self.typecode = 'h' if max(self.lengths, default=0) < 2 ** 15 else 'q'
+        self.start = array.array(self.typecode, [-1] * len(self.parts))
+        self.strings = all(type(self.parts[idx]) == str for idx in self.leaves)
+
+
+class SequenceSpec:
+    """
+    The compiled form of a pattern: the constants and the alphabets of its parts, the direction and the order. A spec
+    never changes, so it is shared by all the sequences created from the same pattern, and creating a sequence from it
+    does not parse the pattern again.
+    """
+
+    __slots__ = ('pattern', 'parts', 'direction', 'order', '_layout')
+
+    def __init__(self, pattern, parts, direction=Sequences.RIGHT_TO_LEFT, order=None):
+        self.pattern = pattern
+        self.parts = tuple(parts)
+        self.direction = direction
+        self.order = tuple(order) if order else None
+        self._layout = None
+
+    def create(self, first_value=None, exhaustion=Sequences.WRAP, exclusion=None):
+        """
+        Create a new sequence from this spec.
+        :param first_value: the first value of the sequence.
+        :param exhaustion: the exhaustion policy of the sequence.
+        :param exclusion: the positions skipped by the sequence.
+        :return: the instance of the class Sequences.
+        """
+        if self._layout is None:
+            self._layout = Sequences(
+                [Sequence(text) if is_sequence else text for text, is_sequence in self.parts],
+                direction=self.direction,
+                order=list(self.order) if self.order else None,
+            )._layout
+        result = Sequences._create(self._layout, exhaustion, exclusion)
+        if first_value is not None:
+            result.set(first_value)
+        return result
+
+    def to_json(self):
+        """
+        :return: the spec as a JSON string, which from_json loads without parsing the pattern again.
+        """
+        import json
+
+        return json.dumps({
+            "pattern": self.pattern,
+            "parts": [[text, is_sequence] for text, is_sequence in self.parts],
+            "direction": self.direction,
+            "order": list(self.order) if self.order else None,
+        })
+
+    @classmethod
+    def from_json(cls, value):
+        """
+        Load a spec saved by to_json.
+        :param value: the JSON string.
+        :return: the instance of the class SequenceSpec.
+        """
+        import json
+
+        value = json.loads(value)
+        parts = [(sys.intern(text), is_sequence) for text, is_sequence in value["parts"]]
+        return cls(value["pattern"], parts, value["direction"], value["order"])
+
+
+def _freeze(values):
+    """
+    :return: the values with all lists replaced by tuples, so they can be used as a key.
+    """
+    if type(values) == list:
+        return tuple(_freeze(value) for value in values)
+    return values
+
+
+def _thaw(values):
+    """
+    :return: the values with all tuples replaced by lists.
+    """
+    if type(values) == tuple:
+        return [_thaw(value) for value in values]
+    return values
+
+
+@functools.lru_cache(maxsize=SPEC_CACHE_SIZE)
+def _compile_spec(pattern, direction, order):
+    """
+    Compile a pattern, the order must have tuples instead of lists to be part of the key of the cache.
+    """
+    parts = [(sys.intern(text), is_sequence) for text, is_sequence in parse(pattern)]
+    if len(parts) <= 0:
+        return None
+
+    prototype = Sequences([Sequence(text) if is_sequence else text for text, is_sequence in parts],
+                          direction=direction, order=_thaw(order))
+    result = SequenceSpec(pattern, parts, direction, prototype.order)
+    result._layout = prototype._layout
+    return result
+
+
+def compile_spec(pattern, direction=Sequences.RIGHT_TO_LEFT, order=None):
+    """
+    Compile a pattern into a SequenceSpec. The specs are kept in a LRU cache keyed by the pattern, the direction and
+    the order, so compiling the same pattern again costs only a lookup.
+    :param pattern: the pattern to compile.
+    :param direction: the direction of the sequence.
+    :param order: the sequence growth order.
+    :return: the instance of the class SequenceSpec or None when the pattern has no parts.
+    """
+    return _compile_spec(pattern, direction, _freeze(order))
+
+
+def spec_cache_info():
+    """
+    :return: the hits, misses, maximum size and current size of the cache of compiled patterns.
+    """
+    return _compile_spec.cache_info()
+
+
+def spec_cache_clear():
+    """
+    Remove all compiled patterns from the cache.
+    """
+    _compile_spec.cache_clear()
+
+
+def factory(pattern, first_value=None, direction=Sequences.RIGHT_TO_LEFT, order=None, exhaustion=Sequences.WRAP,
+            exclusion=None):
     """
     Creates a sequence pattern using a string consisting of constants and regular expressions to represent the sequence
     of values.
@@ -386,6 +1510,8 @@ def factory(pattern, first_value=None, direction=Sequences.RIGHT_TO_LEFT, order=
     :param first_value: the first value of the sequence.
     :param direction: the direction of the sequence.
     :param order: the sequence growth order.
+    :param exhaustion: the exhaustion policy, see Sequences.
+    :param exclusion: the positions skipped by the sequence, see Sequences.
     :return: the instance of the class Sequences.
 
     Examples: the following snippets will generate the sequences:
@@ -503,38 +1629,7 @@ def factory(pattern, first_value=None, direction=Sequences.RIGHT_TO_LEFT, order=
     if pattern is None:
         return None
 
-    pat = pattern.split(";")
-    if len(pat) <= 0:
-        return None
-
-    result = Sequences([], direction=direction, order=order)
-    for x in pat:
-        o = list(exrex.generate(x))
-        n = len(o)
-        if n == 1 and len(o[0]) > 0:
-            result.sequence.append(o[0])
-        elif n > 1 and len(o[0]) == 1:
-            result.sequence.append(Sequence("".join(o)))
-        elif n > 1 and len(o[0]) > 1:
-            for y in range(len(o[0])):
-                aux = []
-                for idx in range(len(o)):
-                    if o[idx][y] not in aux:
-                        aux.append(o[idx][y])
-                if len(aux) > 0:
-                    if len(aux) > 1:
-                        result.sequence.append(Sequence("".join(aux)))
-                    else:
-                        result.sequence.append(aux[0])
-    if len(result.sequence) <= 0:
+    spec = compile_spec(pattern, direction, order)
+    if spec is None:
         return None
-
-    result.build_indexes()
-
-    if order and len(order) > 0:
-        result.check_order(order)
-
-    if first_value is not None:
-        result.set(first_value)
-
-    return result
+    return spec.create(first_value, exhaustion, exclusion)
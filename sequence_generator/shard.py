@@ -0,0 +1,90 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .batch import generate
+except ImportError:
+    from batch import generate
+
+CHUNK_SIZE = 100000
+
+
+def split(sequence, shards):
+    """
+    Split all the positions of a sequence in contiguous ranges with almost the same number of values, the positions
+    excluded by the exclusion of the sequence not being counted.
+    :param sequence: the instance of the class Sequences.
+    :param shards: the number of ranges.
+    :return: a list of ranges, empty ranges are not returned.
+    """
+    size = sequence.size()
+    exclusion = sequence.exclusion
+    count = size if exclusion is None else size - exclusion.count(0, size)
+    result = []
+    start = 0
+    for index in range(shards):
+        if index + 1 >= shards:
+            stop = size
+        elif exclusion is None:
+            stop = count * (index + 1) // shards
+        else:
+            stop = exclusion.nth_allowed(count * (index + 1) // shards)
+        if count * (index + 1) // shards > count * index // shards:
+            result.append(range(start, stop))
+            start = stop
+    return result
+
+
+def _export_shard(sequence, start, stop, path, chunk_size):
+    """
+    Write the values whose positions are between start and stop, one per line, into a file.
+    :return: the path of the file.
+    """
+    with open(path, 'w') as file:
+        for begin in range(start, stop, chunk_size):
+            values = generate(sequence, begin, min(chunk_size, stop - begin))
+            if len(values) > 0:
+                file.write("\n".join(values))
+                file.write("\n")
+    return path
+
+
+def export(sequence, path, shards=None, merge=True, chunk_size=CHUNK_SIZE):
+    """
+    Write all the values of a sequence not excluded, one per line, splitting the positions in contiguous shards that are
+    generated by different processes. Each process receives a copy of the sequence and generates its shard starting at
+    the position of its first value.
+
+    s = factory("[A-Z]{2}-[0-9]{6}")
+    export(s, "codes.txt", shards=8)
+
+    :param sequence: the instance of the class Sequences.
+    :param path: the path of the file, the shards are written to the files path.0, path.1, etc.
+    :param shards: the number of shards, by default the number of CPUs.
+    :param merge: when True the shards are concatenated, in order, into the file path and then removed.
+    :param chunk_size: the number of values generated at once by each process.
+    :return: the list of files written.
+    """
+    if shards is None:
+        shards = os.cpu_count() or 1
+    ranges = split(sequence, shards)
+    paths = ['{path}.{index}'.format(path=path, index=index) for index in range(len(ranges))]
+
+    with ProcessPoolExecutor(max_workers=len(ranges) or 1) as executor:
+        futures = [
+            executor.submit(_export_shard, sequence, r.start, r.stop, shard_path, chunk_size)
+            for r, shard_path in zip(ranges, paths)
+        ]
+        for future in futures:
+            future.result()
+
+    if not merge:
+        return paths
+
+    with open(path, 'wb') as output:
+        for shard_path in paths:
+            with open(shard_path, 'rb') as file:
+                shutil.copyfileobj(file, output)
+            os.remove(shard_path)
+    return [path]
@@ -0,0 +1,66 @@
+import threading
+
+try:
+    from .sequence import SequenceExhausted
+except ImportError:
+    from sequence import SequenceExhausted
+
+
+class ConcurrentSequence:
+    """
+    A sequence shared by many threads. Each thread claims a block of block_size positions from the shared sequence,
+    the only step done while holding the lock, and then renders the values of its block without any lock. Every value
+    is issued only once, but the values of different threads are interleaved by blocks.
+
+    s = ConcurrentSequence(factory("[A-Z]{2}-[0-9]{6}"), block_size=1000)
+    s.alloc()
+    AA-000000
+    """
+
+    def __init__(self, sequence, block_size=1000):
+        self.sequence = sequence
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _claim(self, count):
+        """
+        Claim the next positions of the shared sequence, only the positions left with the RAISE exhaustion policy.
+        :param count: the number of positions.
+        :return: a range with the positions claimed, empty when there are none left.
+        """
+        with self._lock:
+            if self.sequence.exhaustion == self.sequence.RAISE:
+                count = min(count, self.sequence.size() - 1 - self.sequence._get_position())
+            return self.sequence.reserve(count)
+
+    def alloc(self):
+        """
+        Return the next value of the block of the current thread, claiming a new block when it is exhausted, the
+        positions excluded by the sequence being skipped.
+        :return: a value never returned before by this instance.
+        """
+        values = getattr(self._local, 'values', None)
+        while True:
+            if values is not None:
+                value = next(values, None)
+                if value is not None:
+                    return value
+            positions = self._claim(self.block_size)
+            if len(positions) <= 0:
+                raise SequenceExhausted("The sequence has no values left")
+            values = self._local.values = self.sequence.iter_allowed(positions.start, positions.stop)
+
+    def take(self, k):
+        """
+        Return k contiguous values, claimed at once from the shared sequence.
+        :param k: the number of values to return.
+        :return: a list with the values.
+        """
+        result = []
+        while len(result) < k:
+            positions = self._claim(k - len(result))
+            if len(positions) <= 0:
+                break
+            result.extend(self.sequence.iter_allowed(positions.start, positions.stop))
+        return result
@@ -1,5 +1,31 @@
+import asyncio
+import gc
+import io
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
-from sequence import factory, Sequences
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from sequence import factory, Sequences, Sequence, SequenceExhausted, InvalidValue, SequenceSpec, compile_spec, \
+    spec_cache_info, spec_cache_clear
+from patterns import _compile_pattern, _expand_pattern
+from batch import generate, validate, validate_file
+from shard import export, split
+from persistent import PersistentSequence
+from shared import ConcurrentSequence
+from async_sequence import AsyncSequence
+from lease import LeaseManager, LeaseClient, create_server
+import benchmark
+from instrument import instrument, uninstrument
+from exclusion import Exclusion
+from permutation import Permutation
 
 
 class MyTestCase(unittest.TestCase):
@@ -168,6 +194,743 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(seq.previous().get(), 'CC 98')
         self.assertEqual(seq.previous().get(), 'CB 98')
 
+    def test_compile_pattern(self):
+        def parts(values):
+            return [(text, is_sequence) for text, is_sequence in values]
+
+        for pattern in ["[ABC]{2} [0-9]{2}", "[A-Z]-2019-[0-9][0-9]", "WM-", "A[0-9]", "[CBA]", "[a-c0-2]", "\\d{3}",
+                        "[\\-x]", "x{3}", "[A]", "[0-9]{0}"]:
+            self.assertEqual(parts(_compile_pattern(pattern)), parts(_expand_pattern(pattern)))
+
+        for pattern in ["[^a]", "a?", "a{1,2}", "(ab)", "\\w", "a|b"]:
+            self.assertIsNone(_compile_pattern(pattern))
+
+        seq = factory("[A-Z]{3}[0-9]{6}")
+        self.assertEqual(seq.size(), 26 ** 3 * 10 ** 6)
+        self.assertEqual(seq.next().get(), 'AAA000000')
+
+    def test_seek_nth_rank(self):
+        layouts = [{}, {'direction': Sequences.LEFT_TO_RIGHT}, {'order': [1, 0, 4, 3]}, {'order': [[1, 0], [4, 3]]}]
+        for kwargs in layouts:
+            seq = factory("[ABC]{2} [0-9]{2}", **kwargs)
+            values = [seq.next().get() for x in range(905)]
+            seq = factory("[ABC]{2} [0-9]{2}", **kwargs)
+            for n, value in enumerate(values):
+                self.assertEqual(seq.nth(n), value)
+                self.assertEqual(seq.rank(value), n % 900)
+            self.assertEqual(seq.seek(500).get(), values[500])
+            self.assertEqual(seq.rank(), 500)
+            self.assertEqual(seq.next().get(), values[501])
+
+        seq = factory("[ABC]{2} [0-9]{2}")
+        self.assertIsNone(seq.rank('AD 00'))
+        self.assertIsNone(seq.rank('AA-00'))
+        self.assertIsNone(seq.rank('AA 000'))
+
+    def test_factory_first_value(self):
+        seq = factory("[A-Z]{3}[0-9]{6}", first_value='CAB123456')
+        self.assertEqual(seq.get(), 'CAB123456')
+        self.assertEqual(seq.next().get(), 'CAB123457')
+
+        seq = factory("[ABC]{2} [0-9]{2}", first_value='BA 00', direction=Sequences.LEFT_TO_RIGHT)
+        self.assertEqual(seq.next().get(), 'CA 00')
+
+        with self.assertRaises(Exception):
+            factory("[ABC]{2} [0-9]{2}", first_value='ZZ 00')
+
+    def test_take(self):
+        for kwargs in [{}, {'direction': Sequences.LEFT_TO_RIGHT}, {'order': [1, 0, 4, 3]}]:
+            seq = factory("[ABC]{2} [0-9]{2}", **kwargs)
+            other = factory("[ABC]{2} [0-9]{2}", **kwargs)
+            for k in [1, 10, 0, 1000]:
+                self.assertEqual(seq.take(k), [other.next().get() for x in range(k)])
+                self.assertEqual(seq.get(), other.get())
+
+        seq = factory("[ABC]{2} [0-9]{2}")
+        self.assertEqual(seq.reserve(3), range(0, 3))
+        self.assertEqual(seq.get(), 'AA 02')
+        self.assertEqual(seq.reserve(2), range(3, 5))
+
+    def test_get(self):
+        seq = factory("WM-;[ABC]{2} [0-9]{2}")
+        self.assertEqual(seq.get(), 'WM-AA 00')
+        seq.sequence[2].index = 2
+        self.assertEqual(seq.get(), 'WM-AC 00')
+        self.assertEqual(seq.last().get(), 'WM-CC 99')
+        self.assertEqual(seq.next().get_bytes(), b'WM-AA 00')
+
+        seq = Sequences([Sequence('AB'), '-', Sequences([Sequence('01'), Sequence('01')])])
+        self.assertEqual([seq.next().get() for x in range(5)], ['A-00', 'A-01', 'A-10', 'A-11', 'B-00'])
+
+    def test_iter(self):
+        for kwargs in [{}, {'direction': Sequences.LEFT_TO_RIGHT}, {'order': [1, 0, 4, 3]}]:
+            seq = factory("[ABC]{2} [0-9]{2}", **kwargs)
+            values = [seq.nth(n) for n in range(900)]
+            self.assertEqual(list(seq), values)
+            self.assertEqual(list(reversed(seq)), values[::-1])
+            self.assertEqual(list(seq.iter_range(5, 2000, 13)), [seq.nth(n) for n in range(5, 2000, 13)])
+            self.assertEqual(list(seq.iter_range(10, 0, -3)), [values[n] for n in range(10, 0, -3)])
+            self.assertEqual(seq.get(), 'AA 00')
+
+    def test_next_nested_order(self):
+        seq = factory("[0-9]{2} [0-9]{2}", order=[[1, 0], [4, 3]])
+        other = factory("[0-9]{2} [0-9]{2}", order=[1, 0, 4, 3])
+        for x in range(10001):
+            self.assertEqual(seq.next().get(), other.next().get())
+        self.assertEqual(seq.get(), '00 00')
+        self.assertEqual(seq.previous().get(), '99 99')
+        self.assertEqual(seq.previous().get(), '98 99')
+
+    def test_compact(self):
+        seq = factory("WM-;[ABC]{2} [0-9]{2}")
+        other = factory("WM-;[ABC]{2} [0-9]{2}")
+        self.assertFalse(hasattr(seq, '__dict__'))
+        self.assertFalse(hasattr(seq.sequence[1], '__dict__'))
+        self.assertIs(seq.sequence[0], other.sequence[0])
+        self.assertIs(seq.sequence[1].sequence, other.sequence[2].sequence)
+        self.assertIs(seq._layout, other._layout)
+
+        seq = factory("[ABC]{2} [0-9]{2}")
+        seq.seek(25).get()
+        view = seq.sequence[4]
+        view.next()
+        self.assertEqual(seq.get(), "AA 26")
+        self.assertEqual(seq.get_sequences()[3], {"sequence": "0123456789", "index": 6})
+        seq.next().next().next().next()
+        self.assertEqual(view.get(), "0")
+        self.assertEqual(Sequences(None).size(), 0)
+
+        with self.assertRaises(Exception) as context:
+            factory("[ABC]{2} [0-9]{2}", order=[2, 1])
+        self.assertEqual(str(context.exception),
+                         "order at [2] is not a Sequence, please use only the indexes [0, 1, 3, 4]")
+
+        seq = factory("[ABC]{2}")
+        seq.sequence = [Sequence("AB"), "-", Sequence("01")]
+        seq.build_indexes()
+        self.assertEqual(seq.indexes, [0, 2])
+        self.assertEqual(seq.next().next().get(), "A-1")
+        seq.index = 2
+        self.assertEqual(seq.get(), "B-0")
+        self.assertEqual(seq.index, 2)
+
+    def test_distance(self):
+        seq = factory("[ABC]{2} [0-9]{2}")
+        self.assertEqual(seq.distance_to_last(), 899)
+        self.assertEqual(seq.distance_to_first(), 0)
+        seq.next().next()
+        self.assertEqual(seq.distance_to_last(), 898)
+        self.assertEqual(seq.distance_to_first(), 1)
+        self.assertEqual(seq.last().distance_to_last(), 0)
+
+        seq = factory("[ABC]{2} [0-9]{2}", direction=Sequences.LEFT_TO_RIGHT)
+        seq.seek(10)
+        self.assertEqual(seq.distance_to_last(), 889)
+        self.assertEqual(seq.distance_to_first(), 10)
+        self.assertEqual(seq.distance('AA 00', 'BA 00'), 1)
+        self.assertEqual(seq.distance('BA 00', 'AA 00'), -1)
+        self.assertIsNone(seq.distance('AA 00', 'DA 00'))
+
+        seq = factory("[0-9]{30}")
+        self.assertEqual(seq.size(), 10 ** 30)
+        self.assertEqual(seq.distance_to_last(), 10 ** 30 - 1)
+
+        seq = factory("[ABC]{2} [0-9]{2}", order=[4, 0])
+        self.assertEqual(seq.size(), 30)
+
+    def test_generate_batch(self):
+        for kwargs in [{}, {'direction': Sequences.LEFT_TO_RIGHT}, {'order': [2, 1, 5, 4]}]:
+            seq = factory("WM-;[ABC]{2} [0-9]{2}", **kwargs)
+            self.assertEqual(list(generate(seq, 890, 20)), list(seq.iter_range(890, 910)))
+            self.assertEqual(list(generate(seq, 0, 5, 'S')), [v.encode() for v in seq.iter_range(0, 5)])
+
+        seq = factory("[0-9]{30}")
+        self.assertEqual(list(generate(seq, 10 ** 29, 3)), list(seq.iter_range(10 ** 29, 10 ** 29 + 3)))
+
+        seq = factory("[0-9]{2}", exclusion=Exclusion([(0, 5), (12, 20), (95, 100)]))
+        self.assertEqual(list(generate(seq, 0, 100)), list(seq))
+        self.assertEqual(list(generate(seq, 90, 20)), ["90", "91", "92", "93", "94", "05", "06", "07", "08", "09"])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_generate_batch_numpy(self):
+        seq = factory("WM-;[ABC]{2} [0-9]{2}", order=[2, 1, 5, 4])
+        values = generate(seq, 890, 20)
+        self.assertIsInstance(values, numpy.ndarray)
+        self.assertEqual(values.dtype, numpy.dtype('U8'))
+        self.assertEqual(values.tolist(), list(seq.iter_range(890, 910)))
+        values = generate(seq, 0, 5, 'S')
+        self.assertEqual(values.dtype, numpy.dtype('S8'))
+        self.assertEqual(values.tolist(), [v.encode() for v in seq.iter_range(0, 5)])
+
+        seq = factory("[0-9]{2}", exclusion=Exclusion([(0, 5), (12, 20), (95, 100)]))
+        values = generate(seq, 90, 20)
+        self.assertEqual(values.dtype, numpy.dtype('U2'))
+        self.assertEqual(values.tolist(), ["90", "91", "92", "93", "94", "05", "06", "07", "08", "09"])
+
+        seq = factory("[ABC]{2} [0-9]{2}")
+        values = numpy.array(list(seq) + ['AD 00', 'AA00', 'AA 000'])
+        expected = list(range(900)) + [-1] * 3
+        ranks = validate(seq, values)
+        self.assertIsInstance(ranks, numpy.ndarray)
+        self.assertEqual(ranks.tolist(), expected)
+        self.assertEqual(validate(seq, numpy.char.encode(values)).tolist(), expected)
+
+        exclusion = Exclusion.from_ranks(numpy.array([9, 2, 1, 3, 2, 7, 8]))
+        self.assertEqual((exclusion.starts, exclusion.stops, exclusion.totals), ([1, 7], [4, 10], [3, 6]))
+        self.assertEqual(exclusion.count(2, 9), 4)
+        self.assertEqual(exclusion.nth_allowed(1), 4)
+        exclusion = Exclusion.load(factory("[0-9]{2}"), io.StringIO("00\n01\n05\n06\n07\nXX\n98\n"))
+        self.assertEqual((exclusion.starts, exclusion.stops, len(exclusion)), ([0, 5, 98], [2, 8, 99], 6))
+
+    def test_export_shards(self):
+        seq = factory("[ABC]{2} [0-9]{2}", order=[4, 0, 3, 1])
+        self.assertEqual(split(seq, 4), [range(0, 225), range(225, 450), range(450, 675), range(675, 900)])
+        self.assertEqual(split(seq, 1000)[-1], range(899, 900))
+
+        expected = "".join(value + "\n" for value in seq)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'values.txt')
+            self.assertEqual(export(seq, path, shards=3, chunk_size=100), [path])
+            with open(path) as file:
+                self.assertEqual(file.read(), expected)
+            paths = export(seq, path, shards=2, merge=False)
+            self.assertEqual(len(paths), 2)
+            with open(paths[0]) as first, open(paths[1]) as second:
+                self.assertEqual(first.read() + second.read(), expected)
+
+        seq = factory("[0-9]{2}", exclusion=Exclusion([(0, 50)]))
+        self.assertEqual(split(seq, 2), [range(0, 75), range(75, 100)])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'values.txt')
+            export(seq, path, shards=3, chunk_size=7)
+            with open(path) as file:
+                self.assertEqual(file.read().splitlines(), list(seq))
+
+    def test_persistent_sequence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'counter')
+            seq = PersistentSequence(factory("[ABC]{2} [0-9]{2}"), path, batch_size=10)
+            self.assertEqual(seq.next().get(), 'AA 00')
+            self.assertEqual(seq.next().get(), 'AA 01')
+            with open(path) as file:
+                self.assertEqual(file.read(), '10')
+
+            seq = PersistentSequence(factory("[ABC]{2} [0-9]{2}"), path, batch_size=10)
+            self.assertEqual(seq.next().get(), 'AA 10')
+            self.assertEqual(seq.take(25), list(seq.sequence.iter_range(11, 36)))
+            seq.close()
+
+            with PersistentSequence(factory("[ABC]{2} [0-9]{2}"), path) as seq:
+                self.assertEqual(seq.next().get(), 'AA 36')
+
+            seq = PersistentSequence(factory("[ABC]{2} [0-9]{2}", first_value='CC 98'), path + '2')
+            self.assertEqual(seq.next().get(), 'CC 99')
+            self.assertEqual(seq.next().get(), 'AA 00')
+            self.assertEqual(seq.take(150)[-1], 'AB 50')
+            seq = PersistentSequence(factory("[ABC]{2} [0-9]{2}"), path + '2')
+            self.assertEqual(seq.next().get(), 'AA 99')
+
+            def create():
+                return PersistentSequence(factory("[AB]{2} [0-2]{2}", exclusion=Exclusion([(0, 20)])), path + '3', 1)
+            seq = create()
+            self.assertEqual([seq.next().get() for _ in range(3)], ['BA 02', 'BA 10', 'BA 11'])
+            seq = create()
+            self.assertEqual(seq.take(7), ['BA 12', 'BA 20', 'BA 21', 'BA 22', 'BB 00', 'BB 01', 'BB 02'])
+            seq = create()
+            self.assertEqual(seq.take(3), ['BB 10', 'BB 11', 'BB 12'])
+
+            def create():
+                return PersistentSequence(factory("[0-9]", exhaustion=Sequences.SATURATE), path + '4', 1)
+            seq = create()
+            self.assertEqual(seq.take(12), list("0123456789"))
+            self.assertEqual(seq.next().get(), '9')
+            seq = create()
+            self.assertEqual(seq.next().get(), '9')
+
+    def test_concurrent_sequence(self):
+        seq = ConcurrentSequence(factory("[A-Z]{2}[0-9]{4}"), block_size=100)
+        results = []
+
+        def worker():
+            values = [seq.alloc() for x in range(5000)]
+            values.extend(seq.take(250))
+            results.append(values)
+
+        threads = [threading.Thread(target=worker) for x in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        values = [value for result in results for value in result]
+        self.assertEqual(len(values), 8 * 5250)
+        self.assertEqual(len(set(values)), len(values))
+        self.assertEqual(seq.sequence.distance_to_first(), 8 * 5250 - 1)
+
+        seq = ConcurrentSequence(factory("[A-C][0-9]{3}", exhaustion=Sequences.RAISE), block_size=64)
+        results = []
+
+        def drain():
+            values = seq.take(10)
+            try:
+                while True:
+                    values.append(seq.alloc())
+            except SequenceExhausted:
+                results.append(values)
+
+        threads = [threading.Thread(target=drain) for x in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        values = [value for result in results for value in result]
+        self.assertEqual(len(results), 8)
+        self.assertEqual(sorted(values), list(seq.sequence.iter_range(0, 3000)))
+        self.assertEqual(seq.take(10), [])
+
+    def test_concurrent_sequence_exclusion(self):
+        seq = ConcurrentSequence(factory("[0-9]{2}", exclusion=Exclusion([(0, 5), (12, 20)])), block_size=4)
+        self.assertEqual([seq.alloc() for _ in range(5)], ["05", "06", "07", "08", "09"])
+        self.assertEqual(seq.take(4), ["20", "21", "22", "23"])
+
+    def test_async_sequence(self):
+        class Store:
+            def __init__(self):
+                self.sequence = factory("[A-Z]{2}[0-9]{4}")
+
+            async def reserve(self, count):
+                return self.sequence.reserve(count)
+
+        async def run(seq):
+            values = await asyncio.gather(*[seq.alloc() for x in range(10000)])
+            async for value in seq:
+                values.append(value)
+                break
+            return values
+
+        for store in [None, Store()]:
+            seq = AsyncSequence(factory("[A-Z]{2}[0-9]{4}"), buffer_size=500, store=store)
+            loop = asyncio.new_event_loop()
+            try:
+                values = loop.run_until_complete(run(seq))
+            finally:
+                loop.close()
+            self.assertEqual(sorted(values), list(seq.sequence.iter_range(0, 10001)))
+
+        async def allocate(seq, count):
+            return [await seq.alloc() for x in range(count)]
+
+        seq = AsyncSequence(factory("[0-9]{2}", exclusion=Exclusion([(0, 5), (12, 20)])), buffer_size=4, store=Store())
+        loop = asyncio.new_event_loop()
+        try:
+            values = loop.run_until_complete(allocate(seq, 8))
+        finally:
+            loop.close()
+        self.assertEqual(sorted(values), ["05", "06", "07", "08", "09", "10", "11", "20"])
+
+        seq = AsyncSequence(factory("[0-9]", exhaustion=Sequences.RAISE), buffer_size=4, low_water=2)
+        errors = []
+        loop = asyncio.new_event_loop()
+        loop.set_exception_handler(lambda loop, context: errors.append(context))
+        try:
+            values = loop.run_until_complete(allocate(seq, 10))
+            self.assertEqual(values, list("0123456789"))
+            loop.run_until_complete(asyncio.sleep(0.1))
+            with self.assertRaises(SequenceExhausted):
+                loop.run_until_complete(allocate(seq, 1))
+        finally:
+            loop.close()
+        del seq
+        gc.collect()
+        self.assertEqual(errors, [])
+
+        seq = AsyncSequence(factory("[0-9]", exhaustion=Sequences.SATURATE), buffer_size=4)
+        loop = asyncio.new_event_loop()
+        try:
+            values = loop.run_until_complete(allocate(seq, 10))
+            self.assertEqual(values, list("0123456789"))
+            with self.assertRaises(SequenceExhausted):
+                loop.run_until_complete(asyncio.wait_for(allocate(seq, 1), 5))
+        finally:
+            loop.close()
+
+        async def collect(seq):
+            return [value async for value in seq]
+
+        seq = AsyncSequence(
+            factory("[0-9]{2}", exhaustion=Sequences.RAISE, exclusion=Exclusion([(0, 5), (12, 95)])), buffer_size=4
+        )
+        loop = asyncio.new_event_loop()
+        try:
+            values = loop.run_until_complete(collect(seq))
+        finally:
+            loop.close()
+        self.assertEqual(values, ["05", "06", "07", "08", "09", "10", "11", "95", "96", "97", "98", "99"])
+
+    def test_lease_manager(self):
+        manager = LeaseManager(ttl=60)
+        manager.register("codes", "[ABC]{2} [0-9]{2}")
+        first = manager.lease("codes", 100)
+        second = manager.lease("codes", 100)
+        self.assertEqual((first["start"], first["stop"]), (0, 100))
+        self.assertEqual((second["start"], second["stop"]), (100, 200))
+        self.assertTrue(manager.renew(first["id"]))
+        self.assertTrue(manager.release(first["id"], 40))
+        self.assertFalse(manager.release(first["id"], 40))
+        third = manager.lease("codes", 50)
+        self.assertEqual((third["start"], third["stop"]), (40, 90))
+
+        expired = manager.lease("codes", 10, ttl=0)
+        self.assertEqual((expired["start"], expired["stop"]), (90, 100))
+        self.assertFalse(manager.renew(expired["id"]))
+        self.assertFalse(manager.release(expired["id"], expired["start"]))
+        self.assertEqual(manager.lease("codes", 20)["start"], 200)
+
+        manager.register("excluded", "[0-9]{2}", exclusion=[(0, 5), (12, 20)])
+        leases = [manager.lease("excluded", 10) for _ in range(3)]
+        self.assertEqual([(lease["start"], lease["stop"]) for lease in leases], [(5, 10), (10, 12), (20, 30)])
+
+    def test_lease_server(self):
+        manager = LeaseManager()
+        manager.register("codes", "[ABC]{2} [0-9]{2}", direction=Sequences.LEFT_TO_RIGHT)
+        server = create_server(manager, ("127.0.0.1", 0))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            seq = factory("[ABC]{2} [0-9]{2}", direction=Sequences.LEFT_TO_RIGHT)
+            with LeaseClient(server.server_address, "codes", count=10) as first:
+                with LeaseClient(server.server_address, "codes", count=10) as second:
+                    values = [first.alloc() for x in range(15)] + [second.alloc() for x in range(5)]
+                    self.assertEqual(values, list(seq.iter_range(0, 15)) + list(seq.iter_range(20, 25)))
+                    self.assertTrue(second.renew())
+                with self.assertRaises(Exception):
+                    first.call("lease", name="other", count=1)
+            with LeaseClient(server.server_address, "codes", count=10) as third:
+                self.assertEqual(third.alloc(), seq.nth(25))
+                third._file.write(b"not json\n")
+                third._file.flush()
+                self.assertIn("error", json.loads(third._file.readline()))
+                self.assertEqual(third.call("describe", name="codes")["name"], "codes")
+            manager.register("excluded", "[0-9]{2}", exclusion=[(0, 5), (12, 20)])
+            with LeaseClient(server.server_address, "excluded", count=10) as client:
+                self.assertEqual([client.alloc() for x in range(8)], ["05", "06", "07", "08", "09", "10", "11", "20"])
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_compile_spec(self):
+        spec_cache_clear()
+        spec = compile_spec("[ABC]{2} [0-9]{2}", order=[[1, 0], [4, 3]])
+        self.assertIs(compile_spec("[ABC]{2} [0-9]{2}", order=[[1, 0], [4, 3]]), spec)
+        self.assertIsNot(compile_spec("[ABC]{2} [0-9]{2}", order=[1, 0, 4, 3]), spec)
+        self.assertIsNot(compile_spec("[ABC]{2} [0-9]{2}"), spec)
+        self.assertEqual(spec.order, (1, 0, 4, 3))
+        info = spec_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 3))
+
+        seq = spec.create()
+        other = spec.create(first_value='BA 00')
+        self.assertEqual(seq.next().get(), 'AA 00')
+        self.assertEqual(other.next().get(), 'BB 00')
+        self.assertEqual(seq.next().get(), 'AB 00')
+
+        factory("[ABC]{2} [0-9]{2}", order=[[1, 0], [4, 3]])
+        self.assertEqual(spec_cache_info().hits, 2)
+        self.assertIsNone(compile_spec("[0-9]{0}"))
+
+    def test_benchmark(self):
+        results = benchmark.run(["size", "next[order]", "memory[factory]"], repeat=1)
+        self.assertEqual(sorted(results), ["memory[factory]", "next[order]", "size"])
+        self.assertEqual(benchmark.compare({"a": 1.3, "b": 1.1, "c": 1.0}, {"a": 1.0, "b": 1.0}, 0.2), {"a": 1.3})
+
+        code = "import sequence, benchmark; print(sequence.spec_cache_info().currsize)"
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(output.strip(), b'0')
+
+    def test_instrument(self):
+        seq = factory("[ABC]{2} [0-9]{2}")
+        events = []
+        stats = instrument(seq, observer=lambda event, data: events.append(event))
+        for x in range(900):
+            seq.next().get()
+        seq.next()
+        seq.previous()
+        seq.set('AA 05')
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['next'], 901)
+        self.assertEqual(snapshot['previous'], 1)
+        self.assertEqual(snapshot['carries'], {0: 91, 1: 10, 2: 4})
+        self.assertEqual((snapshot['overflows'], snapshot['underflows']), (1, 1))
+        self.assertEqual(snapshot['sets'], 1)
+        self.assertEqual(sum(snapshot['timings']['next'].values()), 901)
+        self.assertEqual(events.count('overflow'), 1)
+        self.assertEqual(events[-1], 'set')
+
+        self.assertIs(uninstrument(seq), stats)
+        self.assertIs(type(seq), Sequences)
+        seq.next()
+        self.assertEqual(stats.snapshot()['next'], 901)
+
+        seq = factory("[AB]{2}")
+        stats = instrument(seq)
+        seq.take(10)
+        seq.advance(10)
+        seq.exclusion = Exclusion([(0, 1)])
+        seq.next()
+        seq.retreat(3)
+        snapshot = stats.snapshot()
+        self.assertEqual((snapshot['overflows'], snapshot['underflows']), (5, 1))
+
+        nested = Sequences([Sequence("AB"), "-", Sequences([Sequence("XY"), Sequence("01")])])
+        stats = instrument(nested)
+        nested.sequence[2].advance(5)
+        self.assertEqual(stats.snapshot()['carries'], {0: 1})
+
+        seq = factory("[AB]{2}", exhaustion=Sequences.SATURATE)
+        stats = instrument(seq)
+        seq.advance(5)
+        self.assertEqual(stats.snapshot()['exhaustions'], 1)
+
+        class Custom(Sequences):
+            pass
+
+        seq = Custom([Sequence("AB"), Sequence("01")])
+        seq.label = "custom"
+        stats = instrument(seq)
+        seq.next().next()
+        self.assertIsInstance(seq, Custom)
+        self.assertEqual(stats.snapshot()['next'], 2)
+        uninstrument(seq)
+        self.assertIs(type(seq), Custom)
+        self.assertEqual(seq.label, "custom")
+
+    def test_exhaustion(self):
+        seq = factory("[AB][0-9]", first_value='B8', exhaustion=Sequences.RAISE)
+        self.assertEqual(seq.next().get(), 'B9')
+        with self.assertRaises(SequenceExhausted):
+            seq.next()
+        self.assertEqual(seq.get(), 'B9')
+        with self.assertRaises(SequenceExhausted):
+            seq.first().previous()
+        self.assertEqual(seq.get(), 'A0')
+        with self.assertRaises(SequenceExhausted):
+            seq.take(21)
+        self.assertEqual(len(seq.take(19)), 19)
+
+        seq = factory("[AB][0-9]", first_value='B8', exhaustion=Sequences.SATURATE)
+        self.assertEqual(seq.next().get(), 'B9')
+        self.assertEqual(seq.next().get(), 'B9')
+        seq.seek(15)
+        self.assertEqual(seq.take(10), ['B6', 'B7', 'B8', 'B9'])
+        self.assertEqual(seq.take(10), [])
+
+        def widen(sequence, flow):
+            sequence.sequence.insert(0, Sequence('0123456789'))
+            sequence.build_indexes()
+            sequence.sequence[0].index = 1
+
+        seq = factory("[0-9]", first_value='8', exhaustion=widen)
+        self.assertEqual(seq.next().get(), '9')
+        self.assertEqual(seq.next().get(), '10')
+        self.assertEqual(seq.take(3), ['11', '12', '13'])
+        seq.seek(97)
+        self.assertEqual(seq.take(4), ['98', '99', '100', '101'])
+
+        seq = factory("[0-9]")
+        seq.last()
+        self.assertEqual(seq.next().get(), '0')
+
+    def test_set(self):
+        seq = factory("[A-Z]{3}-[0-9]{6}")
+        self.assertEqual(seq.set('XYZ-123456').get(), 'XYZ-123456')
+        self.assertEqual(seq.next().get(), 'XYZ-123457')
+        self.assertEqual(seq.set('AAA-000000').previous().get(), 'ZZZ-999999')
+
+        seq = factory("[ABC]{2} [0-9]{2}", direction=Sequences.LEFT_TO_RIGHT)
+        self.assertEqual(seq.set('CA 00').next().get(), 'AB 00')
+
+        for value in ['XYZ-12345', 'XYZ+123456', 'XYZ-12345A', 'xYZ-123456']:
+            with self.assertRaises(InvalidValue):
+                factory("[A-Z]{3}-[0-9]{6}").set(value)
+        with self.assertRaises(InvalidValue):
+            factory("[A-Z]{3}-[0-9]{6}", first_value='XYZ-12345A')
+
+        seq = Sequence('0123456789')
+        self.assertEqual(seq.set('7').get(), '7')
+        with self.assertRaises(InvalidValue):
+            seq.set('A')
+
+    def test_validate(self):
+        for kwargs in [{}, {'direction': Sequences.LEFT_TO_RIGHT}, {'order': [1, 0, 4, 3]}]:
+            seq = factory("[ABC]{2} [0-9]{2}", **kwargs)
+            values = list(seq) + ['AD 00', 'AA00', 'AA 000', '', 'AA-00']
+            expected = list(range(900)) + [None] * 5
+            self.assertEqual(list(seq.validate(values)), expected)
+            expected = [-1 if rank is None else rank for rank in expected]
+            self.assertEqual(list(validate(seq, values)), expected)
+            self.assertEqual(list(validate(seq, [value.encode() for value in values])), expected)
+
+        seq = factory("[ABC]{2} [0-9]{2}")
+        self.assertIn('CB 12', seq)
+        self.assertNotIn('CD 12', seq)
+        self.assertTrue(seq.contains('AA 00'))
+        self.assertFalse(seq.contains('AA 0'))
+        self.assertNotIn(None, seq)
+        self.assertFalse(seq.contains(None))
+        self.assertFalse(seq.contains(12))
+        self.assertFalse(seq.contains(list('AA 00')))
+
+        file = io.StringIO("AA 01\nAA 0X\nCC 99\n")
+        self.assertEqual([list(ranks) for ranks in validate_file(seq, file, 2)], [[1, -1], [899]])
+
+    def test_lazy_exrex(self):
+        code = "import sys, sequence; sequence.factory('[A-Z]{2}-[0-9]{3}').next().get(); " \
+               "print([name for name in ('exrex', 're', 'json', 'hashlib') if name in sys.modules])"
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(output.strip(), b'[]')
+
+    def test_package_import(self):
+        code = "from sequence_generator.sequence import factory; print(factory('[AB]{2}-[0-9]').next().get())"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=root)
+        self.assertEqual(output.strip(), b'AA-0')
+        modules = ["batch", "shard", "persistent", "shared", "async_sequence", "lease", "instrument", "exclusion",
+                   "permutation", "benchmark"]
+        code = "; ".join("import sequence_generator." + module for module in modules)
+        subprocess.check_call([sys.executable, "-c", code], cwd=root)
+
+    def test_spec_serialization(self):
+        spec = compile_spec("WM-;[ABC]{2} [0-9]{2}", order=[[2, 1], [5, 4]])
+        for other in [SequenceSpec.from_json(spec.to_json()), pickle.loads(pickle.dumps(spec))]:
+            self.assertEqual(other.parts, spec.parts)
+            self.assertEqual(other.order, spec.order)
+            self.assertEqual(other.create().take(20), spec.create().take(20))
+
+    def test_snapshot(self):
+        seq = factory("WM-;[ABC]{2} [0-9]{2}", order=[[2, 1], [5, 4]])
+        fresh = factory("WM-;[ABC]{2} [0-9]{2}", order=[[2, 1], [5, 4]])
+        self.assertEqual(fresh.restore(seq.snapshot()).next().get(), "WM-AA 00")
+        seq.take(321)
+        data = seq.snapshot()
+        self.assertLessEqual(len(data), 12)
+        self.assertEqual(fresh.restore(data).get(), seq.get())
+        self.assertEqual(fresh.take(5), seq.take(5))
+        with self.assertRaises(InvalidValue):
+            factory("WM-;[ABC]{2} [0-9]{2}").restore(data)
+
+        nested = Sequences(
+            [Sequence("AB"), "-", Sequences([Sequence("XYZ"), Sequence("01")])], exhaustion=Sequences.RAISE
+        )
+        nested.take(4)
+        other = pickle.loads(pickle.dumps(nested))
+        self.assertEqual(other.get(), nested.get())
+        self.assertEqual(other.exhaustion, Sequences.RAISE)
+        self.assertEqual(other.take(3), nested.take(3))
+        instrument(nested)
+        other = pickle.loads(pickle.dumps(nested))
+        self.assertIs(type(other), Sequences)
+        self.assertEqual(other.next().get(), nested.next().get())
+
+    def test_advance(self):
+        for kwargs in [{}, {"direction": Sequences.LEFT_TO_RIGHT}, {"order": [3, 0, 4, 1]}]:
+            for n in [1, 7, 10, 123, 399, 400, 1000]:
+                seq = factory("[AB]{2}-[0-9]{2}", **kwargs)
+                expected = factory("[AB]{2}-[0-9]{2}", **kwargs)
+                seq.take(13)
+                expected.take(13)
+                for _ in range(n):
+                    expected.next().get()
+                self.assertEqual(seq.advance(n).get(), expected.get())
+                for _ in range(n):
+                    expected.previous().get()
+                self.assertEqual(seq.retreat(n).get(), expected.get())
+
+        nested = Sequences([Sequence("AB"), "-", Sequences([Sequence("XYZ"), Sequence("01")])])
+        nested.next().get()
+        nested.sequence[2].advance(7)
+        self.assertEqual(nested.get(), "B-X1")
+        self.assertEqual(nested.advance(-8).get(), "B-Z1")
+
+        seq = factory("[0-9]{2}", exhaustion=Sequences.RAISE)
+        with self.assertRaises(SequenceExhausted):
+            seq.advance(101)
+        self.assertEqual(seq.get(), "99")
+        seq = factory("[0-9]{2}", exhaustion=Sequences.SATURATE)
+        self.assertEqual(seq.advance(20).retreat(30).get(), "00")
+
+        seq = factory("[0-9]{2}", exclusion=Exclusion([(5, 10)]))
+        self.assertEqual(seq.advance(6).get(), "10")
+        for start, n in [(-1, 1), (3, 2), (7, 1), (7, 300), (97, 9)]:
+            seq = factory("[0-9]{2}", exclusion=Exclusion([(0, 2), (5, 10), (40, 60), (98, 100)]))
+            expected = factory("[0-9]{2}", exclusion=Exclusion([(0, 2), (5, 10), (40, 60), (98, 100)]))
+            if start >= 0:
+                seq.seek(start)
+                expected.seek(start)
+            for _ in range(n):
+                expected.next()
+            self.assertEqual(seq.advance(n).get(), expected.get())
+            for _ in range(n + 3):
+                expected.previous()
+            self.assertEqual(seq.retreat(n + 3).get(), expected.get())
+        with self.assertRaises(SequenceExhausted):
+            factory("[0-9]", exclusion=Exclusion([(0, 10)])).advance(1)
+
+    def test_exclusion(self):
+        exclusion = Exclusion.load(factory("[0-9]{2}"), io.StringIO("00\n01\n05\n06\n07\nXX\n98\n"))
+        self.assertEqual((exclusion.starts, exclusion.stops), ([0, 5, 98], [2, 8, 99]))
+        self.assertEqual(len(exclusion), 6)
+        self.assertIn(6, exclusion)
+        self.assertNotIn(8, exclusion)
+
+        seq = factory("[0-9]{2}", exclusion=exclusion)
+        self.assertEqual([seq.next().get() for _ in range(5)], ["02", "03", "04", "08", "09"])
+        self.assertEqual([seq.previous().get() for _ in range(5)], ["08", "04", "03", "02", "99"])
+        self.assertEqual(seq.take(4), ["02", "03", "04", "08"])
+        self.assertEqual(len(list(seq)), 94)
+        self.assertEqual(list(reversed(seq))[:3], ["99", "97", "96"])
+        self.assertEqual(list(seq)[:4], ["02", "03", "04", "08"])
+
+        seq = factory("[0-9]{2}", exhaustion=Sequences.RAISE, exclusion=Exclusion([(10, 100)]))
+        with self.assertRaises(SequenceExhausted):
+            seq.take(11)
+        self.assertEqual(seq.take(10)[-1], "09")
+        seq = factory("[0-9]{2}", exhaustion=Sequences.SATURATE, exclusion=Exclusion([(5, 100)]))
+        self.assertEqual(seq.take(10), ["00", "01", "02", "03", "04"])
+        self.assertEqual(seq.next().get(), "04")
+        seq = factory("[0-9]{2}", exclusion=Exclusion([(0, 100)]))
+        with self.assertRaises(SequenceExhausted):
+            seq.next()
+
+    def test_permutation(self):
+        for pattern in ["[0-9]", "[AB]", "[0-9]{3}", "[0-9]{2}[A-C]"]:
+            permutation = Permutation(factory(pattern), key="secret")
+            positions = [permutation.permute(i) for i in range(factory(pattern).size())]
+            self.assertEqual(sorted(positions), list(range(len(positions))))
+            self.assertEqual([permutation.invert(position) for position in positions], list(range(len(positions))))
+
+        permutation = Permutation(factory("[A-Z]{2}-[0-9]{6}"), key="secret")
+        values = [permutation.next().get() for _ in range(5)]
+        self.assertNotEqual(values, factory("[A-Z]{2}-[0-9]{6}").take(5))
+        self.assertNotEqual(values, Permutation(factory("[A-Z]{2}-[0-9]{6}"), key="other").take(5))
+        resumed = Permutation(factory("[A-Z]{2}-[0-9]{6}"), key="secret", counter=2)
+        self.assertEqual(resumed.take(3), values[2:])
+        self.assertEqual(resumed.counter, 5)
+        self.assertEqual(resumed.get(), values[-1])
+
+        permutation = Permutation(factory("[0-9]", exhaustion=Sequences.RAISE), key="secret")
+        self.assertEqual(sorted(permutation.take(10)), list("0123456789"))
+        with self.assertRaises(SequenceExhausted):
+            permutation.next()
+
+        seq = factory("[0-9]{2}", exhaustion=Sequences.RAISE, exclusion=Exclusion([(0, 5), (50, 90)]))
+        permutation = Permutation(seq, key="secret")
+        values = permutation.take(55)
+        self.assertEqual(sorted(values), list(seq))
+        with self.assertRaises(SequenceExhausted):
+            permutation.next()
+
 
 if __name__ == '__main__':
     unittest.main()
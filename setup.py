@@ -21,5 +21,8 @@ setuptools.setup(
     install_requires=[
         'exrex==0.10.5',
     ],
-    python_requires='>=3.6',
+    extras_require={
+        'numpy': ['numpy'],
+    },
+    python_requires='>=3.7',
 )
\ No newline at end of file